@@ -0,0 +1,113 @@
+# import libraries
+import os.path
+
+import cv2
+import matplotlib.pyplot as plt
+import numpy as np
+import yaml
+# import utilities
+from utils.image_utils import blend_rectangle, fig_to_img
+
+# read the bar plot configuration variables
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+with open(os.path.join(root_dir, "configs", "default_configs.yaml"), "r") as default_config_file:
+    data_configs = yaml.load(default_config_file, Loader=yaml.FullLoader)["data"]
+
+
+class BarPlot:
+    """
+    The bar plot component, showing the value of each area as a bar in the area's colour.
+    The axes, title, ticks and labels are drawn once with matplotlib, and each frame only fills in the bars.
+    """
+
+    def __init__(self, height, width, names):
+        self.height = int(height)
+        self.width = int(width)
+        self.names = names
+        self.min_value = data_configs["min_value"]
+        self.max_value = data_configs["max_value"]
+        self.image = None
+        self.background = None
+        self.bar_x_coords = None
+        self.axes_y_coords = None
+        self.y_limits = None
+        self._create_background()
+
+    def _create_background(self):
+
+        # draw the bar plot with empty bars to find where the bars go
+        fig = plt.figure()
+        ax = plt.subplot(
+            title="The {} in the different areas.".format(data_configs["title"]),
+            xlabel="Areas",
+            ylim=(self.min_value, self.max_value),
+            ylabel=data_configs["title"],
+        )
+        bars = plt.bar(self.names, np.zeros(len(self.names)))
+        for bar in bars:
+            bar.set_visible(False)
+        img = fig_to_img(fig)
+        fig_height, fig_width, _ = img.shape
+
+        # find where the bars and the y-axis limits are on the final image
+        # matplotlib measures pixels up from the bottom of the figure
+        scale_x = self.width / fig_width
+        scale_y = self.height / fig_height
+        bar_left_corners = ax.transData.transform([(bar.get_x(), 0) for bar in bars])
+        bar_right_corners = ax.transData.transform([(bar.get_x() + bar.get_width(), 0) for bar in bars])
+        self.bar_x_coords = np.column_stack((bar_left_corners[:, 0], bar_right_corners[:, 0])) * scale_x
+        axes_corners = ax.transData.transform([(0, self.min_value), (0, self.max_value)])
+        self.axes_y_coords = (fig_height - axes_corners[:, 1]) * scale_y
+
+        # keep the bars inside the axes lines so they don't cover them
+        half_spine_width = ax.spines["bottom"].get_linewidth() * fig.dpi / 72 * scale_y / 2
+        self.y_limits = (self.axes_y_coords[1] + half_spine_width, self.axes_y_coords[0] - half_spine_width)
+        plt.close(fig)
+
+        # resize the image to the desired size
+        self.background = cv2.resize(img, (self.width, self.height))
+
+    def _value_to_y(self, values):
+        bottom_y, top_y = self.axes_y_coords
+        return bottom_y + ((values - self.min_value) / (self.max_value - self.min_value) * (top_y - bottom_y))
+
+    def create(self, values, colours):
+        """
+        Function Goal : draw the bars for a set of values on the bar plot
+
+        values : 1D numpy array of floats - the value of each area, NaN values get no bar
+        colours : 2D numpy array of uint8 integers - the BGR colour for each bar
+
+        return : 3D numpy array of uint8 integers - the bar plot image
+        """
+        self.image = self.background.copy()
+        bar_tops = self._value_to_y(np.asarray(values, dtype=float))
+        bar_bottom = self._value_to_y(0.0)
+        for (x_start, x_end), bar_top, colour in zip(self.bar_x_coords, bar_tops, colours):
+            if np.isnan(bar_top):
+                continue
+            # bars going past the axes limits are cut off
+            y_start = max(min(bar_top, bar_bottom), self.y_limits[0])
+            y_end = min(max(bar_top, bar_bottom), self.y_limits[1])
+            blend_rectangle(self.image, x_start, y_start, x_end, y_end, colour)
+        return self.image
+
+    def plot(self):
+        plt.imshow(cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
+        plt.show()
+
+
+def main():
+    width = input("What width bar plot do you want to create? ")
+    height = input("What height bar plot do you want to create? ")
+    names = input("What are the names of the areas, separated by spaces? ").split()
+
+    bar_plot = BarPlot(height, width, names)
+    values = np.linspace(data_configs["min_value"], data_configs["max_value"], len(names) + 1)[1:]
+    colours = plt.get_cmap("plasma")(values / data_configs["max_value"], bytes=True)[:, 2::-1]
+    bar_plot.create(values, colours)
+    bar_plot.plot()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,14 @@
 import os.path
 
 import cv2
-import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import yaml
+# import helper classes
+from data_models.colour_lut import ColourLUT
 # import utilities
 from utils.cv2_config import cv2_dict
+from utils.image_utils import colour_to_uint
 
 # read the colourmap customisation configuration variables
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -19,15 +21,29 @@ with open(os.path.join(root_dir, "configs", "default_configs.yaml"), "r") as def
 
 class ColourMap:
 
-    def __init__(self, height, width):
+    def __init__(self, height, width, lut=None):
         self.final_height = int(height)
         self.final_width = int(width)
         self.inner_width = None
         self.inner_height = None
         self.image = None
-        self.mapper = matplotlib.cm.ScalarMappable(
-            norm=matplotlib.colors.Normalize(vmin=data_configs["min_value"], vmax=data_configs["max_value"]),
-            cmap=colourmap_configs["background"]["cmap_name"]
+        self.lut = lut if lut is not None else self.create_lut()
+
+    @staticmethod
+    def create_lut(nan_colour=(0, 0, 0)):
+        """
+        Function Goal : create the lookup table of colours the colourmap gives to the data values
+
+        nan_colour : tuple of numbers (num, num, num) - the colour to give to NaN values
+
+        return : ColourLUT object
+        """
+        return ColourLUT(
+            colourmap_configs["background"]["cmap_name"],
+            data_configs["min_value"],
+            data_configs["max_value"],
+            num_colours=colourmap_configs["lookup_table"]["num_colours"],
+            nan_colour=nan_colour,
         )
 
     @staticmethod
@@ -75,7 +91,7 @@ class ColourMap:
             (heading_start_x_coord, heading_start_y_coord),
             heading_font,
             heading_size,
-            colourmap_configs["text"]["heading"]["colour"],
+            colour_to_uint(colourmap_configs["text"]["heading"]["colour"]),
             lineType=colourmap_configs["text"]["heading"]["line_type"],
             thickness=heading_thickness,
         )
@@ -87,7 +103,7 @@ class ColourMap:
         seperator_thickness = int(self.inner_height * colourmap_configs["proportions"]["height"]["seperator"])
 
         # draw line to separate heading area
-        seperator_colour = colourmap_configs["lines"]["seperator"]["colour"]
+        seperator_colour = colour_to_uint(colourmap_configs["lines"]["seperator"]["colour"])
         self.image[heading_box_height + 1: heading_box_height + 1 + seperator_thickness, :, :] = seperator_colour
 
     def _draw_spectrum(self):
@@ -103,10 +119,8 @@ class ColourMap:
         spectrum_vals = np.linspace(start=data_configs["min_value"], stop=data_configs["max_value"], num=spectrum_width)
 
         # draw the colourmap spectrum on the image
-        for val in spectrum_vals:
-            colour = self.mapper.to_rgba(val)[:3][::-1]
-            self.image[(y_coord - spectrum_height):y_coord, x_coord, :] = colour
-            x_coord = x_coord + 1
+        spectrum_colours = self.lut.to_bgr(spectrum_vals)
+        self.image[(y_coord - spectrum_height):y_coord, x_coord:(x_coord + spectrum_width), :] = spectrum_colours
 
     def _draw_spectrum_index_lines(self):
 
@@ -128,7 +142,7 @@ class ColourMap:
 
         # draw the colourmap index lines
         for x_coord in line_x_coords:
-            colour = colourmap_configs["lines"]["index"]["colour"]
+            colour = colour_to_uint(colourmap_configs["lines"]["index"]["colour"])
             half_thickness = int(self.inner_width * colourmap_configs["lines"]["index"]["width_proportion"]) // 2
             self.image[
                 (y_coord - line_height):y_coord,
@@ -168,7 +182,7 @@ class ColourMap:
                 (x_coord - (index_width // 2), y_coord),
                 index_font,
                 index_size,
-                color=colourmap_configs["text"]["index"]["colour"],
+                color=colour_to_uint(colourmap_configs["text"]["index"]["colour"]),
                 lineType=cv2_dict[colourmap_configs["text"]["index"]["line_type"]],
                 thickness=index_thickness,
             )
@@ -180,14 +194,15 @@ class ColourMap:
         desired_height : integer - the height of the final created colourmap
         desired_width : integer - the width of the final created colourmap
 
-        return : a 3D numpy array of integers - an array that corresponds to the colourmap image that was created
+        return : a 3D numpy array of uint8 integers - an array that corresponds to the colourmap image that was created
         """
 
         # define blank colourmap array
         border_width = int(self.final_width * colourmap_configs["lines"]["border"]["width_proportion"])
         self.inner_width = self.final_width - (2 * border_width)
         self.inner_height = self.final_height - (2 * border_width)
-        self.image = np.ones((self.inner_height, self.inner_width, 3)) * colourmap_configs["background"]["colour"]
+        self.image = np.empty((self.inner_height, self.inner_width, 3), dtype=np.uint8)
+        self.image[:] = colour_to_uint(colourmap_configs["background"]["colour"])
 
         # draw colourmap
         self._draw_heading()
@@ -200,11 +215,11 @@ class ColourMap:
         self.image = cv2.copyMakeBorder(
             self.image, top=border_width, bottom=border_width, left=border_width, right=border_width,
             borderType=cv2_dict[colourmap_configs["lines"]["border"]["type"]],
-            value=colourmap_configs["lines"]["border"]["colour"]
+            value=colour_to_uint(colourmap_configs["lines"]["border"]["colour"])
         )
 
     def plot(self):
-        plt.imshow(self.image)
+        plt.imshow(cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
         plt.show()
 
 
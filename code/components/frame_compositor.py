@@ -0,0 +1,244 @@
+# import libraries
+import os.path
+
+import cv2
+import numpy as np
+import yaml
+# import utilities
+from utils.cv2_config import cv2_dict
+from utils.image_utils import colour_to_uint
+from utils.maths_utils import split_length
+
+# read the heatmap customisation configuration variables
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+with open(os.path.join(root_dir, "configs", "default_configs.yaml"), "r") as default_config_file:
+    video_configs = yaml.load(default_config_file, Loader=yaml.FullLoader)["video"]
+with open(os.path.join(root_dir, "configs", "heatmap_configs.yaml"), "r") as heatmap_config_file:
+    heatmap_configs = yaml.load(heatmap_config_file, Loader=yaml.FullLoader)
+border_configs = heatmap_configs["borders"]
+
+
+class FrameCompositor:
+    """
+    Builds the parts of each video frame that never change during a run (borders, colourmap, heatmap background,
+    area outlines, area labels and arrows) once, and then composes every frame by adding only the per-second
+    components to a copy of it. The layout fills the video resolution exactly and every frame is composed in the same
+    output buffer, so no frame is allocated, joined together or resized while rendering.
+    """
+
+    def __init__(self, video_width, video_height, num_cameras):
+        self.video_width = int(video_width)
+        self.video_height = int(video_height)
+        self.num_cameras = num_cameras
+        self.num_on_rhs = num_cameras - (num_cameras // 2)
+        self.num_on_lhs = num_cameras - self.num_on_rhs
+        self.rects = {}
+        self.borders = {}
+        self.image = None
+        self.frame = None
+        self.area_indices = None
+        self.overlay_indices = None
+        self.overlay_values = None
+        self.overlay_transmittance = None
+        self.component_overlays = {}
+        self._define_layout()
+
+    def _add_rect(self, name, top, left, height, width, border_name=None):
+        """
+        Function Goal : store the outer rectangle of a component and the rectangle inside its border
+
+        name : string - the name of the component
+        top, left : integers - the position of the component's top left corner in the frame
+        height, width : integers - the size of the component including its border
+        border_name : string - the key of the border configuration to use, or None if the component has no border
+
+        return : None
+        """
+        border_width = int(width * border_configs[border_name]["width_proportion"]) if border_name else 0
+        self.borders[name] = (border_width, border_name)
+        self.rects[name] = (
+            top + border_width, left + border_width, height - (2 * border_width), width - (2 * border_width),
+        )
+        self.rects[name + "_outer"] = (top, left, height, width)
+
+    def _define_layout(self):
+
+        # split the frame into columns and rows that fill it exactly
+        proportions = video_configs["proportions"]
+        lhs_width, heatmap_width, rhs_width = split_length(
+            self.video_width,
+            [proportions["width"]["cameras"], proportions["width"]["background"], proportions["width"]["cameras"]],
+        )
+        event_box_height, heatmap_height, colourmap_height = split_length(
+            self.video_height,
+            [proportions["height"]["events_box"], proportions["height"]["background"], proportions["height"]["colourmap"]],
+        )
+        self.height = self.video_height
+        self.width = self.video_width
+
+        # define the central components - the colourmap and timer share the row below the heatmap
+        colourmap_width, timer_width = split_length(
+            heatmap_width, [proportions["width"]["colourmap"], proportions["width"]["timer"]],
+        )
+        self._add_rect("event_box", 0, lhs_width, event_box_height, heatmap_width, "event_box")
+        self._add_rect("heatmap", event_box_height, lhs_width, heatmap_height, heatmap_width)
+        bottom_y = event_box_height + heatmap_height
+        self._add_rect("colourmap", bottom_y, lhs_width, colourmap_height, colourmap_width)
+        self._add_rect("timer", bottom_y, lhs_width + colourmap_width, colourmap_height, timer_width, "timer")
+
+        # define the camera components - the bar plot goes below the cameras on the LHS
+        rhs_left = lhs_width + heatmap_width
+        lhs_heights = split_length(self.height, [1] * (self.num_on_lhs + 1))
+        lhs_tops = np.cumsum([0] + lhs_heights[:-1]).tolist()
+        for i in range(self.num_on_lhs):
+            self._add_rect(f"camera_{i}", lhs_tops[i], 0, lhs_heights[i], lhs_width, "cameras")
+        self._add_rect("bar_plot", lhs_tops[-1], 0, lhs_heights[-1], lhs_width, "cameras")
+        rhs_heights = split_length(self.height, [1] * self.num_on_rhs) if self.num_on_rhs else []
+        rhs_tops = np.cumsum([0] + rhs_heights[:-1]).tolist()
+        for i in range(self.num_on_rhs):
+            self._add_rect(f"camera_{self.num_on_lhs + i}", rhs_tops[i], rhs_left, rhs_heights[i], rhs_width, "cameras")
+
+        # define the points on the camera components that the arrows start from
+        self.camera_midpoints = []
+        for i in range(self.num_on_lhs):
+            self.camera_midpoints.append((lhs_width, int(lhs_tops[i] + (lhs_heights[i] / 2))))
+        for i in range(self.num_on_rhs):
+            self.camera_midpoints.append((rhs_left, int(rhs_tops[i] + (rhs_heights[i] / 2))))
+
+    def size(self, name):
+        """
+        Function Goal : get the size of the area inside the border of a component
+
+        name : string - the name of the component
+
+        return : tuple of integers (int, int) - the width and height of the component
+        """
+        _, _, height, width = self.rects[name]
+        return width, height
+
+    def view(self, image, name, outer=False):
+        top, left, height, width = self.rects[name + "_outer" if outer else name]
+        return image[top:top + height, left:left + width]
+
+    def _draw_borders(self):
+        for name, (border_width, border_name) in self.borders.items():
+            if border_width and border_configs[border_name]["type"] == "BORDER_CONSTANT":
+                self.view(self.image, name, outer=True)[:] = colour_to_uint(border_configs[border_name]["colour"])
+                self.view(self.image, name)[:] = 255
+
+    def _draw_overlay(self, draw_overlay):
+        """
+        Function Goal : draw the static parts that sit on top of the per-second components and store them so that
+                        they can be put back on each frame without redrawing them
+
+        draw_overlay : function - draws the overlay onto the image it is given
+
+        return : None
+        """
+        # draw the overlay on a black and a white canvas
+        # any pixel the overlay doesn't touch keeps its canvas colour, so the difference gives how much shows through
+        on_black = np.zeros(self.image.shape, dtype=np.uint8)
+        on_white = np.full(self.image.shape, 255, dtype=np.uint8)
+        draw_overlay(on_black)
+        draw_overlay(on_white)
+        transmittance = cv2.subtract(on_white, on_black)
+
+        # keep the overlay pixels only
+        flat_transmittance = transmittance.reshape(-1, 3)
+        self.overlay_indices = np.flatnonzero((flat_transmittance != 255).any(axis=1))
+        self.overlay_values = on_black.reshape(-1, 3)[self.overlay_indices].astype(np.uint16)
+        self.overlay_transmittance = flat_transmittance[self.overlay_indices].astype(np.uint16)
+
+    def create(self, heatmap_background, colourmap_image, area_pixels, draw_overlay):
+        """
+        Function Goal : create the static layer of the frame
+
+        heatmap_background : 3D numpy array of uint8 integers - the heatmap with none of its areas coloured
+        colourmap_image : 3D numpy array of uint8 integers - the colourmap component
+        area_pixels : 1D numpy array of integers - the flat positions of the area pixels in the heatmap
+        draw_overlay : function - draws the parts that go on top of the coloured areas onto the full frame image it is given
+
+        return : None
+        """
+        self.image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.frame = np.empty_like(self.image)
+        self._draw_borders()
+        self.view(self.image, "heatmap")[:] = heatmap_background
+        self.view(self.image, "colourmap")[:] = colourmap_image
+        self._draw_overlay(draw_overlay)
+
+        # find where the area pixels are in the full frame
+        top, left, _, heatmap_width = self.rects["heatmap"]
+        rows, cols = np.divmod(area_pixels, heatmap_width)
+        self.area_indices = ((top + rows) * self.width) + left + cols
+
+    def _is_drawn_with_border(self, name):
+        # borders that depend on the component are drawn with it, constant borders are part of the static layer
+        border_width, border_name = self.borders[name]
+        return bool(border_width) and border_configs[border_name]["type"] != "BORDER_CONSTANT"
+
+    def _place(self, frame, name, component):
+        if self._is_drawn_with_border(name):
+            border_width, border_name = self.borders[name]
+            cv2.copyMakeBorder(
+                component, top=border_width, bottom=border_width, left=border_width, right=border_width,
+                borderType=cv2_dict[border_configs[border_name]["type"]],
+                value=colour_to_uint(border_configs[border_name]["colour"]),
+                dst=self.view(frame, name, outer=True),
+            )
+        else:
+            self.view(frame, name)[:] = component
+
+    def _apply_overlay(self, flat_frame, overlay_positions=slice(None)):
+        indices = self.overlay_indices[overlay_positions]
+        under_overlay = self.overlay_transmittance[overlay_positions] * flat_frame[indices]
+        flat_frame[indices] = np.minimum(self.overlay_values[overlay_positions] + ((under_overlay + 127) // 255), 255)
+
+    def compose(self, area_colours, event_box, timer, camera_frames, bar_plot):
+        """
+        Function Goal : put the per-second components into a copy of the static layer in the output buffer
+
+        area_colours : 2D numpy array - the colour of each pixel in the heatmap areas, in the order of 'area_pixels'
+        event_box, timer, bar_plot : 3D numpy arrays - the components sized to fit inside their borders
+        camera_frames : list of 3D numpy arrays - one frame from each camera sized to fit inside its border
+
+        return : 3D numpy array - the full video frame, which is the output buffer and so is changed by the next call
+        """
+        if self.image is None:
+            raise ValueError("Cannot compose a frame before the static layer is made. Please run 'create()' first.")
+        frame = self.frame
+        np.copyto(frame, self.image)
+        flat_frame = frame.reshape(-1, 3)
+        flat_frame[self.area_indices] = area_colours
+        self._place(frame, "event_box", event_box)
+        self._place(frame, "timer", timer)
+        self._place(frame, "bar_plot", bar_plot)
+        for i, camera_frame in enumerate(camera_frames):
+            self._place(frame, f"camera_{i}", camera_frame)
+
+        # put the static overlay back on top
+        self._apply_overlay(flat_frame)
+
+        return frame
+
+    def replace(self, name, component):
+        """
+        Function Goal : put a new per-second component into the last frame composed, keeping the rest of the frame
+
+        name : string - the name of the component to replace
+        component : 3D numpy array - the new component sized to fit inside its border
+
+        return : 3D numpy array - the full video frame with the new component, which is the output buffer
+        """
+        frame = self.frame
+        self._place(frame, name, component)
+
+        # put back the part of the static overlay over the pixels the component was drawn on only
+        if name not in self.component_overlays:
+            top, left, height, width = self.rects[name + "_outer" if self._is_drawn_with_border(name) else name]
+            rows, cols = np.divmod(self.overlay_indices, self.width)
+            in_component = (rows >= top) & (rows < top + height) & (cols >= left) & (cols < left + width)
+            self.component_overlays[name] = np.flatnonzero(in_component)
+        self._apply_overlay(frame.reshape(-1, 3), self.component_overlays[name])
+
+        return frame
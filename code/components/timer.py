@@ -0,0 +1,89 @@
+# import libraries
+import os.path
+
+import cv2
+import matplotlib.pyplot as plt
+import numpy as np
+import yaml
+# import helper classes
+from data_models.glyph_atlas import get_glyph_atlas
+# import utilities
+from utils.image_utils import colour_to_uint
+
+# read the timer customisation configuration variables
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+with open(os.path.join(root_dir, "configs", "heatmap_configs.yaml"), "r") as heatmap_config_file:
+    timer_font_configs = yaml.load(heatmap_config_file, Loader=yaml.FullLoader)["fonts"]["timer"]
+
+
+class Timer:
+    """
+    The timer component, showing a second as HH:MM:SS. The image is kept between seconds and only the characters that
+    changed since the last second are drawn again.
+    """
+
+    def __init__(self, height, width):
+        self.height = int(height)
+        self.width = int(width)
+        self.image = np.full((self.height, self.width, 3), 255, dtype=np.uint8)
+        self.text = None
+        self.origin = None
+        self.colour = colour_to_uint(timer_font_configs["colour"])
+        # timers of the same width share their drawn characters
+        self.atlas = get_glyph_atlas("timer", self.width)
+
+    @staticmethod
+    def _second_to_text(second):
+        total_minutes = second // 60
+        secs = second % 60
+        mins = total_minutes % 60
+        hrs = total_minutes // 60
+        return f"{hrs:02}:{mins:02}:{secs:02}"
+
+    def create(self, second):
+        """
+        Function Goal : update the timer image to show a particular second
+
+        second : integer - the second that the particular frame is produced at
+
+        return : 3D numpy array of uint8 integers - the timer image, which is changed by the next call
+        """
+        text = self._second_to_text(second)
+
+        # draw all the text again when it moves
+        if (self.text is None) or (len(text) != len(self.text)):
+            text_width, text_height = self.atlas.text_size(text)
+            self.origin = (int(self.width / 2 - text_width / 2), int(self.height / 2 + text_height / 2))
+            self.image[:] = 255
+            self.atlas.draw(self.image, text, self.origin, self.colour)
+
+        # otherwise only clear and draw the columns of the characters that changed
+        else:
+            spans = self.atlas.layout(text, self.origin)
+            changed = [span for span, new, old in zip(spans, text, self.text) if new != old]
+            if changed:
+                x_start = min(left for _, left, _, _, _ in changed)
+                x_end = max(right for _, _, _, right, _ in changed)
+                self.image[:, max(x_start, 0):max(x_end, 0)] = 255
+                self.atlas.draw(self.image, text, self.origin, self.colour, x_range=(x_start, x_end))
+
+        self.text = text
+        return self.image
+
+    def plot(self):
+        plt.imshow(cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
+        plt.show()
+
+
+def main():
+    width = input("What width timer do you want to create? ")
+    height = input("What height timer do you want to create? ")
+    second = input("What second do you want the timer to show? ")
+
+    timer = Timer(height, width)
+    timer.create(int(second))
+    timer.plot()
+
+
+if __name__ == "__main__":
+    main()
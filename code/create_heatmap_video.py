@@ -1,25 +1,49 @@
 #!/usr/bin/env python
 
 # import libraries
+import hashlib
+import json
 import os.path
+import queue
+import shutil
+import sys
+import tempfile
 import time
+from collections import deque
+from functools import lru_cache, partial
+from itertools import dropwhile, takewhile
 
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import yaml
 from tqdm.auto import tqdm
 
 # import helper classes
+from components.bar_plot import BarPlot
 from components.colourmap import ColourMap
+from components.frame_compositor import FrameCompositor
+from components.timer import Timer
+from data_models.area_map import AreaMap
+from data_models.event_index import EventIndex
+from data_models.frame_schedule import FrameSchedule
+from data_models.glyph_atlas import get_glyph_atlas
 from data_models.shape import Shape
 from input_handlers.heatmap_inputs import HeatmapInputHandler
+from input_output.csv_stream import can_stream_csv, read_area_window, stream_csv_data
+from input_output.dataframe_cache import get_cache_key, get_cached_dataframe
+from input_output.frame_prefetcher import FrameNumberFeed, FramePrefetcher
+from input_output.frame_sinks import create_frame_sink
+from input_output.render_checkpoint import RenderCheckpoint
+from input_output.video_index import VideoIndex
+from input_output.video_proxy import get_video_proxy
 from input_output.video_reader import VideoReader
+from input_output.video_stitcher import get_segment_format, stitch_videos
 # import utilities
 from utils.cv2_config import cv2_dict
-from utils.image_utils import fig_to_img, uint_to_float
+from utils.image_utils import colour_to_uint, fit_to_size
 from utils.maths_utils import convert_cartesian_to_polar, convert_polar_to_cartesian
+from utils.parallel_utils import map_in_order, map_with_retries, run_pipeline
 
 # read configurations
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -40,42 +64,117 @@ bg_area_configs = heatmap_configs["background_areas"]
 event_box_configs = heatmap_configs["events_box"]
 camera_configs = heatmap_configs["cameras"]
 
-# lists for timing everything
-define_heatmap_times = []
-define_event_box_times = []
-define_timer_times = []
-central_merge_times = []
-read_frame_times = []
-define_bar_plot_times = []
-side_merge_times = []
-draw_arrows_times = []
-loop_times = []
+# the stages of rendering, in the order they are timed
+render_stages = [
+    "colourmap", "static layer",
+    "define heatmap", "define event box", "define timer", "read camera frames", "define bar plot", "compose frame",
+]
 
 
-def read_csvs_into_dataframes(csv_file_paths):
+def new_render_stats():
+    # the number of frames, the number that only needed their timer changed, the number kept from an earlier try, then
+    # the seconds spent in each stage and the seconds each thread of the pipeline spent working and waiting
+    return {
+        "frames": 0, "reused frames": 0, "checkpointed frames": 0, **dict.fromkeys(render_stages, 0.0), "pipeline": {},
+    }
+
+
+def add_stats(total_stats, stats):
+    # add each number in the stats to the total, going into the dictionaries of stats inside it
+    for stat, value in stats.items():
+        if isinstance(value, dict):
+            add_stats(total_stats.setdefault(stat, {}), value)
+        else:
+            total_stats[stat] = total_stats.get(stat, 0) + value
+    return total_stats
+
+
+def read_csv_into_dataframe(csv_path):
+    """
+    Function Goal : Read a csv into a DataFrame with 2 columns, Second and Sensor value
+
+    csv_path : string - the path to the csv
+
+    return : DataFrame
+    """
+    # read the data
+    raw_df = pd.read_csv(csv_path, names=data_configs["columns"])
+
+    # turn minute to second
+    raw_df["Second"] = raw_df["Minute"].astype(float) * 60
+    df = raw_df.drop(columns=["Minute"])
+    # average duplicate values
+    processed_df = df.groupby('Second').mean()
+    # make second index a datetime object
+    processed_df.index = pd.to_datetime(processed_df.index, unit="s")
+
+    return processed_df
+
+
+def read_csv_window_into_dataframe(csv_path, start_time=None, end_time=None):
+    """
+    Function Goal : Read the rows of a csv that a time window is made from into a DataFrame, like
+                    'read_csv_into_dataframe()'
+                    The csv is read a chunk at a time up to the end of the window, or whole if it's too far out of order
+
+    csv_path : string - the path to the csv
+    start_time : integer - the first second in the window, None to start at the first row
+    end_time : integer - the second the window ends before, None to end after the last row
+
+    return : DataFrame
+    """
+    try:
+        times, values = read_area_window(csv_path, data_configs["columns"], start_time, end_time)
+    except ValueError:
+        return read_csv_into_dataframe(csv_path)
+
+    return pd.DataFrame({data_configs["columns"][1]: values}, index=pd.DatetimeIndex(times, name="Second"))
+
+
+def read_csvs_into_dataframes(csv_file_paths, cache_folder=None):
     """
     Function Goal : Read each csv into a DataFrame with 2 columns, Second and Sensor value, and add the DataFrame to a list
 
     csv_file_paths : list of strings - a list of paths to the csvs input
+    cache_folder : string - the folder to keep the DataFrames in between runs, None to read every csv
 
     return : list of DataFrames
     """
-    # read the data
-    raw_dfs = [pd.read_csv(csv_path, names=data_configs["columns"]) for csv_path in csv_file_paths]
+    if cache_folder is None:
+        return [read_csv_into_dataframe(csv_path) for csv_path in csv_file_paths]
+    return [
+        get_cached_dataframe(
+            get_cache_key("area", [csv_path], data_configs), cache_folder, partial(read_csv_into_dataframe, csv_path)
+        )
+        for csv_path in csv_file_paths
+    ]
+
+
+def load_csv_data(csv_file_paths, start_time=None, end_time=None):
+    """
+    Function Goal : Read the csvs into one DataFrame with a row for each second, like 'process_csv_dataframes()'
+                    If the configs ask for it, the DataFrames are kept in the cache, so unchanged csvs aren't read again
+                    Otherwise only the rows a time window is made from are read, which gives the same rows in the window
 
-    # process the data
-    processed_dfs = []
-    for raw_df in raw_dfs:
-        # turn minute to second
-        raw_df["Second"] = raw_df["Minute"].astype(float) * 60
-        df = raw_df.drop(columns=["Minute"])
-        # average duplicate values
-        processed_df = df.groupby('Second').mean()
-        # make second index a datetime object
-        processed_df.index = pd.to_datetime(processed_df.index, unit="s")
-        processed_dfs.append(processed_df)
+    csv_file_paths : list of strings - a list of paths to the csvs input
+    start_time : integer - the first second in the window, None to start at the first row
+    end_time : integer - the second the window ends before, None to end after the last row
 
-    return processed_dfs
+    return : DataFrame - a DataFrame with one Second per row and the sensor values from each csv in its columns
+    """
+    if not default_configs["heatmap"]["csv_cache"]:
+        if (start_time is None) and (end_time is None):
+            return process_csv_dataframes(read_csvs_into_dataframes(csv_file_paths))
+        return process_csv_dataframes(
+            [read_csv_window_into_dataframe(csv_path, start_time, end_time) for csv_path in csv_file_paths]
+        )
+
+    cache_folder = os.path.join(default_configs["heatmap"]["cache_folder"], "csv_data")
+    return get_cached_dataframe(
+        get_cache_key("joined", csv_file_paths, data_configs),
+        cache_folder,
+        lambda: process_csv_dataframes(read_csvs_into_dataframes(csv_file_paths, cache_folder)),
+    )
 
 
 def process_csv_dataframes(list_of_dfs):
@@ -105,71 +204,79 @@ def process_csv_dataframes(list_of_dfs):
     return resampled_df.ffill(limit_area="inside")
 
 
-def create_area_masks(list_of_area_details, img_shape):
+def get_window_bounds(seconds, start_time=None, end_time=None):
+    """
+    Function Goal : find the rows inside a time window with a binary search of their seconds
+
+    seconds : 1D numpy array of numbers - the second of each row, in sorted order
+    start_time : integer - the first second in the window, None to start at the first row
+    end_time : integer - the second the window ends before, None to end after the last row
+
+    return : tuple of integers (int, int) - the position of the first row in the window and of the row after the last
+    """
+    start = 0 if start_time is None else int(np.searchsorted(seconds, start_time, side="left"))
+    end = len(seconds) if end_time is None else int(np.searchsorted(seconds, end_time, side="left"))
+    return start, max(start, end)
+
+
+def create_area_map(list_of_area_details, img_shape):
     """
-    Function Goal : Iterate over the dictionaries, call the function "create_array_of_shapes" and put the created arrays and their centres in a list
+    Function Goal : Turn each dictionary into a shape object and draw all the shapes onto one area map
 
     list_of_area_details : list of dictionaries - a list of dictionaries containing the details needed to identify the shapes and their coordinates on the image
-    img_shape : tuple (int, int, int) - the size of the background image that the masks are to be drawn on
+    img_shape : tuple (int, int, int) - the size of the background image that the areas are to be drawn on
 
-    return : list of shape objects
+    return : list of shape objects, AreaMap object
     """
     area_shapes = [Shape.from_dict(area_info_dict) for area_info_dict in list_of_area_details]
-    for shape in area_shapes:
-        shape.create_masks(img_shape, outline_thickness=bg_area_configs["outline_thickness"])
-    return area_shapes
-
-
-def add_colour_to_area_masks_and_merge(sensor_values, shape_objects, mapper):
-    """
-    Function Goal : Be given a row from the DataFrame which is a row of the sensor values for 1 frame worth of video for each differnt shape in the list of shapes
-                    and to turn the mask for each shape the colour output when the sensor value for its respective csv is put into the mapper
-
-    sensor_values : pd.Series - a row from the DataFrame which gives a sensor reading for each csv input
-    shape_objects : list of shape objects - a list containing objects whereby the masks for each shape is accessible
-    mapper : the heatmap mapper that maps a number to a colour
-
-    return : list of shape objects - a list containing objects whereby the masks for each shape is accessible
-    """
-    default_colour = np.array(bg_area_configs["colour_when_nan"]) / 255
-    outline_colour = heatmap_configs["borders"]["areas"]["colour"]
-    coloured_shape_objs = []
-    for val, shape in zip(sensor_values, shape_objects):
-        area_colour = default_colour if np.isnan(val) else np.array(mapper.to_rgba(val)[:3][::-1])
-        shape.change_colour(fill_colour=area_colour, outline_colour=outline_colour)
-        shape.create_merged_mask()
-        coloured_shape_objs.append(shape)
-    return coloured_shape_objs
-
-
-def join_shapes_to_background(shape_objects, background_array):
-    # join shapes together
-    shapes_canvas = np.zeros(background_array.shape)
-    empty = [0, 0, 0]
-    for shape in shape_objects:
-        # if canvas is blank, fill this value with the shape
-        shapes_canvas = np.where(
-            (shape.merged_mask != empty) & (shapes_canvas == empty),
-            shape.merged_mask,
-            shapes_canvas
-        )
-        # if the canvas is filled, fill with the mean values
-        shapes_canvas = np.where(
-            (shape.merged_mask != empty) & (shapes_canvas != empty),
-            np.mean([shape.merged_mask, shapes_canvas], axis=0),
-            shapes_canvas
-        )
+    area_map = AreaMap(area_shapes, img_shape, outline_thickness=bg_area_configs["outline_thickness"])
+    return area_shapes, area_map
+
 
-    # overlay the joined shapes onto the background image
-    background_with_areas = cv2.addWeighted(
-        src1=np.where(shapes_canvas != empty, shapes_canvas, background_array),
+def create_heatmap_background(area_map, background_array):
+    """
+    Function Goal : Blend the parts of the heatmap that don't change from frame to frame
+
+    area_map : AreaMap object - the labels of the areas on the background image
+    background_array : 3D numpy array of uint8 integers - the background image
+
+    return : 3D numpy array, 2D numpy array - the background with the area outlines blended on,
+                                              and the background under each area pixel
+    """
+    # overlay the outlines onto the background image
+    outlines = background_array.copy()
+    outlines[area_map.outline_labels != 0] = colour_to_uint(border_configs["areas"]["colour"])
+    heatmap_background = cv2.addWeighted(
+        src1=outlines,
         alpha=bg_area_configs["transparency_alpha"],
         src2=background_array,
         beta=1 - bg_area_configs["transparency_alpha"],
         gamma=bg_area_configs["transparency_gamma"],
     )
 
-    return background_with_areas
+    # get the background under the areas to blend the area colours with
+    area_background = background_array.reshape(-1, 3)[area_map.area_pixels]
+
+    return heatmap_background, area_background
+
+
+def colour_areas(area_map, area_colours, area_background):
+    """
+    Function Goal : Blend the colour of each area with the background under it
+
+    area_map : AreaMap object - the labels of the areas on the background image
+    area_colours : 2D numpy array of uint8 integers - the BGR colour for each area, from the colour lookup table
+    area_background : 2D numpy array of uint8 integers - the background under each area pixel
+
+    return : 2D numpy array of uint8 integers - the colour of each area pixel
+    """
+    return cv2.addWeighted(
+        src1=area_map.colour_pixels(area_colours),
+        alpha=bg_area_configs["transparency_alpha"],
+        src2=area_background,
+        beta=1 - bg_area_configs["transparency_alpha"],
+        gamma=bg_area_configs["transparency_gamma"],
+    )
 
 
 def label_areas_on_background(background_with_areas, list_of_area_centres, names):
@@ -204,7 +311,7 @@ def label_areas_on_background(background_with_areas, list_of_area_centres, names
             (start_x_coord, start_y_coord),
             label_font,
             label_size,
-            color=font_configs["areas"]["colour"],
+            color=colour_to_uint(font_configs["areas"]["colour"]),
             lineType=cv2_dict[font_configs["areas"]["line_type"]],
             thickness=label_thickness,
         )
@@ -212,34 +319,22 @@ def label_areas_on_background(background_with_areas, list_of_area_centres, names
     return background_with_areas
 
 
-def create_event_text_box(second, events_dict, final_width, final_height, event_duration):
+def create_event_text_box(text, x_width, y_height):
     """
     Function Goal : Create the event text box for the top of the visualisation
 
-    second : integer - the second that the particular frame is produced at
-    events_dict : dictionary of integer to string {integer : string, integer : string, ... etc.} - This is a dictionary of different integers representing particular
-                                                                                                          seconds in the video mapped to an event that happend at that
-                                                                                                          second. The string contains the text to be displayed in the text
-                                                                                                          box at the top of the image.
-    final_width : integer - the width of the text box along the x-axis
-    final_height : integer - the height of the text box on the y-axis
-    event_duration : integer - the number of frames either side of the event to display the text for that event
+    text : string - the text about the event to show in the text box, or None to leave the text box empty
+    x_width : integer - the width of the text box along the x-axis, inside its border
+    y_height : integer - the height of the text box on the y-axis, inside its border
 
     return : 3D numpy array of integers - an array corresponding to the text box containing the text about the event
     """
 
     # define blank text box
-    border_width = int(final_width * border_configs["event_box"]["width_proportion"])
-    x_width = final_width - (2 * border_width)
-    y_height = final_height - (2 * border_width)
-    text_box = np.ones((y_height, x_width, 3))
-
-    # get text for event box
-    potential_seconds = list(range(second - event_duration, second + 1))
-    found_seconds = [sec for sec in potential_seconds if sec in events_dict]
-    if found_seconds:
-        sec_to_display = max(found_seconds)
-        text = events_dict[sec_to_display]
+    text_box = np.full((y_height, x_width, 3), 255, dtype=np.uint8)
+
+    # draw the text if there is an event to show
+    if text is not None:
 
         # define text variables
         event_thickness = int(x_width * font_configs["event_box"]["proportions"]["thickness"])
@@ -250,7 +345,7 @@ def create_event_text_box(second, events_dict, final_width, final_height, event_
         text_width, text_height = cv2.getTextSize(text, event_font, event_size, thickness=event_thickness)[0]
         while text_width > x_width:
             print(
-                "WARNING: Event name associated with second '{sec_to_display}' is too long for text box. "
+                f"WARNING: Event name '{text}' is too long for text box. "
                 "Will be truncated."
             )
             # TODO: Add newline instead of truncating
@@ -266,475 +361,882 @@ def create_event_text_box(second, events_dict, final_width, final_height, event_
             (start_x_coord, start_y_coord),
             event_font,
             event_size,
-            color=font_configs["event_box"]["colour"],
+            color=colour_to_uint(font_configs["event_box"]["colour"]),
             lineType=cv2_dict[font_configs["event_box"]["line_type"]],
             thickness=event_thickness,
         )
 
-    # put border on the text box
-    bordered_text_box = cv2.copyMakeBorder(
-        text_box, top=border_width, bottom=border_width, left=border_width, right=border_width,
-        borderType=cv2_dict[border_configs["event_box"]["type"]], value=border_configs["event_box"]["colour"],
-    )
-
-    return bordered_text_box
+    return text_box
 
 
-def create_timer(second, final_width, final_height):
+def open_camera_video(video_file_path):
     """
-    Function Goal : Take an integer second and create an array corresponding to an image that is a particular width and height that contains the second fed in
+    Function Goal : open a camera video for reading, with its stored index if the configs ask for one
 
-    second : integer - the second that the particular frame is produced at
-    final_width : integer - the width along the x-axis to make the array
-    final_height : integer - the height along the y-axis to make the array
+    video_file_path : string - the path to the camera video
 
-    return : a 3D numpy array of integers - this array corresponds to the image of a particular width and height that contains the integer second given
+    return : VideoReader object
     """
+    index = VideoIndex.load(video_file_path) if default_configs["heatmap"]["camera_index"] else None
+    return VideoReader(video_file_path, index=index)
 
-    # define blank timer box
-    border_width = int(final_width * border_configs["timer"]["width_proportion"])
-    x_width = final_width - (2 * border_width)
-    y_height = final_height - (2 * border_width)
-    timer = np.ones((y_height, x_width, 3))
-
-    # get text for timer
-    total_minutes = second // 60
-    secs = second % 60
-    mins = total_minutes % 60
-    hrs = total_minutes // 60
-    text = f"{hrs:02}:{mins:02}:{secs:02}"
-
-    # define text variables
-    timer_thickness = int(x_width * font_configs["timer"]["proportions"]["thickness"])
-    timer_size = x_width * font_configs["timer"]["proportions"]["size"]
-    timer_font = cv2_dict[font_configs["timer"]["type"]]
-
-    # define position to draw text
-    text_width, text_height = cv2.getTextSize(text, timer_font, timer_size, thickness=timer_thickness)[0]
-    start_y = int(y_height / 2 + text_height / 2)
-    start_x = int(x_width / 2 - text_width / 2)
-
-    # draw the text on the image
-    cv2.putText(
-        timer,
-        text,
-        (start_x, start_y),
-        timer_font,
-        timer_size,
-        color=font_configs["timer"]["colour"],
-        lineType=cv2_dict[font_configs["timer"]["line_type"]],
-        thickness=timer_thickness,
-    )
 
-    # put border on the image
-    bordered_timer = cv2.copyMakeBorder(
-        timer, top=border_width, bottom=border_width, left=border_width, right=border_width,
-        borderType=cv2_dict[border_configs["timer"]["type"]], value=border_configs["timer"]["colour"],
-    )
-
-    return bordered_timer
+def get_camera_timings(video_file_paths):
+    """
+    Function Goal : find the frame rate and number of frames of each camera video, as the renderer's readers see them
 
+    video_file_paths : list of strings - the paths to the camera videos
 
-def create_bar_plot(sensor_values, final_width, final_height, names, bar_colours):
+    return : list of tuples [(float, int), ...] - the frame rate and number of frames of each video
     """
-    Function Goal : take a row of sensor values and make a bar plot from these integers
+    timings = []
+    for path in video_file_paths:
+        video_obj = open_camera_video(path)
+        timings.append((video_obj.frame_rate, video_obj.nframes))
+        video_obj.release()
+    return timings
 
-    sensor_values : pd.Series of integers - a row from a DataFrame containing sensor values used to colour the bar plot
-    final_width : integer - the width on the x-axis to make the bar plot
-    final_height : integer - the height on the y-axis to make the bar plot
-    names : list of strings [str, str, ...etc.] - a list containing the names of the cameras to put on the bar plot
-    bar_colours: list of 3x1 numpy arrays of integers - these arrays represent the RGB colour for each bar
 
-    return : an 3D numpy array of integers - an array corresponding to an image of the bar plot
+def create_event_index(event_details):
     """
+    Function Goal : index the events, each shown for the text duration in the configs
 
-    # create bar plot figure
-    fig = plt.figure()
-    plt.subplot(
-        title="The {} in the different areas.".format(data_configs["title"]),
-        xlabel="Areas",
-        ylim=(data_configs["min_value"], data_configs["max_value"]),
-        ylabel=data_configs["title"],
-    )
-    # TODO: make bar plot bars the same colour as heatmap areas
-    plt.bar(names, sensor_values, color=bar_colours)
-
-    # turn the figure to an image array
-    # TODO: investigate faster way to construct bar plot component
-    img = fig_to_img(fig)
-    plt.close(fig)
-
-    # resize the image to the desired size
-    border_width = int(final_width * border_configs["cameras"]["width_proportion"])
-    x_width = final_width - (2 * border_width)
-    y_height = final_height - (2 * border_width)
-    image = cv2.resize(img, (x_width, y_height))
-
-    # put border on the image
-    bordered_image = cv2.copyMakeBorder(
-        image, top=border_width, bottom=border_width, left=border_width, right=border_width,
-        borderType=cv2_dict[border_configs["cameras"]["type"]], value=border_configs["cameras"]["colour"],
-    )
+    event_details : dictionary of integers to strings {int: str, ...} - the text of the event at each second
 
-    return bordered_image
+    return : EventIndex object
+    """
+    return EventIndex(event_details, int(video_configs["frame_rate"] * event_box_configs["text_duration"]))
 
 
-def read_camera_frames(video_objects, second):
+def read_camera_frames(video_objects, frame_numbers):
     """
     Function Goal : read in one frame from each video.
 
     video_objects : list of video reader objects - list of objects which allow us to read frames from each video
-    second : integer - the second we want the frames to correspond to
+    frame_numbers : list of numbers [float, None, ...] - the frame to read from each video, or None if the video has finished
 
     return : a List of 3D numpy arrays of images => [Array, array, ...] - list of the read-in frames
     """
     frames = []
-    for video_obj in video_objects:
+    for video_obj, frame_number in zip(video_objects, frame_numbers):
         try:
-            # TODO: investigate faster way to read frames
-            frame = uint_to_float(video_obj.get_frame(video_obj.frame_rate * second))
+            if frame_number is None:
+                raise ValueError(f"The video at '{video_obj.file_path}' has finished.")
+            # the frames are asked for in order, so the reader decodes forward to them instead of seeking
+            frame = video_obj.get_frame(frame_number)
         except ValueError:
-            frame = np.zeros((1, 1, 3))
+            frame = np.zeros((1, 1, 3), dtype=np.uint8)
         frames.append(frame)
     return frames
 
 
+@lru_cache(maxsize=None)
+def get_colour_lut():
+    """
+    Function Goal : get the lookup table of the colours the data values are shown in, made once in each process as it
+                    only depends on the configurations
+
+    return : ColourLUT object
+    """
+    return ColourMap.create_lut(nan_colour=bg_area_configs["colour_when_nan"])
+
+
+@lru_cache(maxsize=None)
+def get_colourmap_image(height, width, colour_lut):
+    """
+    Function Goal : get the colourmap image at a size, drawn once in each process for each size and lookup table
+
+    height : integer - the height of the colourmap
+    width : integer - the width of the colourmap
+    colour_lut : ColourLUT object - the colours the colourmap shows
+
+    return : 3D numpy array of uint8 integers - the colourmap image, which must not be changed
+    """
+    cmap = ColourMap(height, width, lut=colour_lut)
+    cmap.create()
+    return cmap.image
+
+
+# the event text boxes that have been drawn, kept between renders in the same process
+get_event_box = lru_cache(maxsize=event_box_configs["cache_size"])(create_event_text_box)
+
+
 def add_colour_and_text_if_empty(frame):
     # if the frame isn't empty, don't add text
     if not (frame == np.zeros((1, 1, 3))).all():
         return frame
 
     # add colour to frame
-    coloured_frame = np.where(frame == np.zeros((1, 1, 3)), camera_configs["colour_when_finished"], frame) / 255
+    coloured_frame = np.where(frame == 0, camera_configs["colour_when_finished"], frame).astype(np.uint8)
 
     # get text to write
     text = camera_configs["text_when_finished"]
 
     # define text variables
     height, width, _ = coloured_frame.shape
-    frame_thickness = int(width * font_configs["cameras"]["proportions"]["thickness"])
-    frame_size = width * font_configs["cameras"]["proportions"]["size"]
-    frame_font = cv2_dict[font_configs["cameras"]["type"]]
+    atlas = get_glyph_atlas("cameras", width)
 
     # define position to draw text
-    text_width, text_height = cv2.getTextSize(text, frame_font, frame_size, thickness=frame_thickness)[0]
+    text_width, text_height = atlas.text_size(text)
     start_y = int(height / 2 + text_height / 2)
     start_x = int(width / 2 - text_width / 2)
 
     # draw the text on the image
-    cv2.putText(
-        coloured_frame,
-        text,
-        (start_x, start_y),
-        frame_font,
-        frame_size,
-        color=font_configs["cameras"]["colour"],
-        lineType=cv2_dict[font_configs["cameras"]["line_type"]],
-        thickness=frame_thickness,
-    )
+    atlas.draw(coloured_frame, text, (start_x, start_y), colour_to_uint(font_configs["cameras"]["colour"]))
 
     return coloured_frame
 
 
-def get_lhs_and_rhs_frames(video_frames, final_width, total_height):
+def resize_camera_frames(video_frames, frame_sizes):
     """
-    Function goal : Take the list of the arrays corresponding to a frame from the different videos and separate these into the images that will go on the LHS and the RHS,
-                    then merge all the LHS and RHS images, put a border around them and then add the bar plot to the LHS image.
+    Function goal : Resize the frames from the different videos to fit inside the borders of their camera components,
+                    colouring and adding text to the frames of videos which have finished
 
-    frames : A list of 3D numpy arrays [Array, Array, etc...] - A list of arrays of the different images from the different videos that corresponds to 1 frame of video
-                                                                The length of this list is the number of videos that will feature on the frame
-    num_videos_on_lhs : integer - the number of images on the left hand side of the main heatmap image
-    bar_plot_image : 3D numpy array of integers - this array represents the image of the bar plot
+    video_frames : A list of 3D numpy arrays [Array, Array, etc...] - A list of arrays of the different images from the different videos that corresponds to 1 frame of video
+    frame_sizes : A list of tuples of integers [(int, int), (int, int), etc...] - the width and height of each camera component inside its border
 
-    return : 3D numpy arrays of integers => Array, Array - the left array is an array corresponding to the image that will go to the left of the main heatmap image
-                                                           the right array is an array corresponding to the image that will go to the right of the main heatmap image
+    return : A list of 3D numpy arrays [Array, Array, etc...] - the resized frames
     """
+    resized_frames = [fit_to_size(frame, size) for frame, size in zip(video_frames, frame_sizes)]
+    return [add_colour_and_text_if_empty(frame) for frame in resized_frames]
 
-    # decide which side each frame goes on
-    num_videos_on_rhs = len(video_frames) - (len(video_frames) // 2 if video_frames else 0)
-    lhs_frames = video_frames[:-num_videos_on_rhs]
-    rhs_frames = video_frames[-num_videos_on_rhs:]
-
-    # set the height to set the frames
-    border_width = int(final_width * border_configs["cameras"]["width_proportion"])
-    lhs_y_height = (total_height // (len(lhs_frames) + 1)) - (2 * border_width)
-    rhs_y_height = (total_height // len(rhs_frames)) - (2 * border_width)
-
-    # resize the images
-    x_width = final_width - (2 * border_width)
-    resized_lhs_frames = [cv2.resize(frame, (x_width, lhs_y_height)) for frame in lhs_frames]
-    resized_rhs_frames = [cv2.resize(frame, (x_width, rhs_y_height)) for frame in rhs_frames]
-
-    # add text to empty frames
-    lhs_frames_with_txt = [add_colour_and_text_if_empty(frame) for frame in resized_lhs_frames]
-    rhs_frames_with_txt = [add_colour_and_text_if_empty(frame) for frame in resized_rhs_frames]
-
-    # add border to images
-    def add_border(image, width, btype, colour):
-        return cv2.copyMakeBorder(
-            image, top=width, bottom=width, left=width, right=width, borderType=btype, value=colour,
-        )
-
-    border_type = cv2_dict[border_configs["cameras"]["type"]]
-    border_colour = border_configs["cameras"]["colour"]
-    bordered_lhs_frames = [add_border(frame, border_width, border_type, border_colour) for frame in lhs_frames_with_txt]
-    bordered_rhs_frames = [add_border(frame, border_width, border_type, border_colour) for frame in rhs_frames_with_txt]
 
-    return bordered_lhs_frames, bordered_rhs_frames, bordered_lhs_frames[0].shape[0]
-
-
-def draw_arrows_from_cameras_to_shapes(image, shape_objects, camera_image_midpoints):
+def get_arrow_lines(shape_objects, camera_image_midpoints, image_width):
     """
-    Function Goal : Take an array corresponding to the image, change some values so that when it is turned to an image, arrows are drawn between the shapes on the image
-                    and the boxes containing the camera footage
+    Function Goal : Find the lines that make up the arrows between the boxes containing the camera footage and the shapes on the image
+                    The shapes and the boxes don't move during the video, so this only needs to be done once
 
-    image : 3D numpy array of integers - the array that corresponds to one frame of the video
-    shape_objects : list of dictionaries - a list of dictionaries containing the details needed to identify the shapes and their coordinates on the image
+    shape_objects : list of shape objects - the shapes on the image, in the position they are drawn on the full frame
     camera_image_midpoints : list of tuples of integers [(int, int), (int, int), ...etc.] - a list of points. These points are the coordinates of the midpoints of the edges of the boxes
                                      containing camera footage
+    image_width : integer - the width of the full frame
 
-    return : 3D numpy array of integers - the array that corresponds to one frame of the video that includes the arrows draw on the image
+    return : list of tuples of points [((int, int), (int, int)), ...etc.] - the start and end of each line, the line from the camera to the shape followed by the 2 arrow-head lines
     """
-
+    arrow_lines = []
     for shape, cam_midpoint in zip(shape_objects, camera_image_midpoints):
 
         # get the closest point on the shape
         closest = shape.get_closest_point(cam_midpoint)
 
-        # draw arrow line from area to the camera midpoint
-        _, width, _ = image.shape
-        arrow_thickness = int(width * arrow_configs["proportions"]["thickness"])
-        arrow_type = arrow_configs["line_type"]
-        arrow_colour = arrow_configs["colour"]
-        cv2.line(
-            img=image, pt1=cam_midpoint, pt2=closest,
-            color=arrow_colour, thickness=arrow_thickness, lineType=arrow_type,
-        )
+        # arrow line from area to the camera midpoint
+        arrow_lines.append((cam_midpoint, closest))
 
         # define arrow-head angle
         dist_between_point = (cam_midpoint[0] - closest[0], cam_midpoint[1] - closest[1])
         _, pi = convert_cartesian_to_polar(dist_between_point)
         angles = [pi - arrow_configs["head_angle"], pi + arrow_configs["head_angle"]]
 
-        # draw the arrow-head lines
-        head_length = width * arrow_configs["proportions"]["head_length"]
+        # the arrow-head lines
+        head_length = image_width * arrow_configs["proportions"]["head_length"]
         for angle in angles:
             x, y = convert_polar_to_cartesian(head_length, angle)
-            cv2.line(
-                img=image, pt1=(closest[0] + x, closest[1] + y), pt2=closest,
-                color=arrow_colour, thickness=arrow_thickness, lineType=arrow_type,
-            )
+            arrow_lines.append(((closest[0] + x, closest[1] + y), closest))
 
-    return image
+    return arrow_lines
 
 
-def get_camera_image_midpoints(first_x, second_x, num_on_lhs, num_on_rhs, total_height):
+def draw_arrow_lines(image, arrow_lines):
     """
-    Function goal : create a list of points corresponding to the midpoints of the LHS and RHS camera images
+    Function Goal : Draw the lines of the arrows between the camera footage and the shapes onto the array that corresponds to the image
 
-    first_x : integer - the x-axis value for the midpoints of the LHS camera image
-    second_x : integer - the x-axis value for the midpoints of the RHS camera image
-    num_on_lhs : integer - the number of points to get corresponding to the LHS camera images
-    num_on_rhs : integer - the number of points to get corresponding to the RHS camera images
-    total_height : integer - the total height along the y-axis of all camera images stacked on top of each other
+    image : 3D numpy array of integers - the array that corresponds to one frame of the video
+    arrow_lines : list of tuples of points [((int, int), (int, int)), ...etc.] - the start and end of each line of the arrows
 
-    return : list of tuples of integers [(int, int), (int, int), ...etc.] - list of camera image mid-points
+    return : 3D numpy array of integers - the array that corresponds to one frame of the video that includes the arrows draw on the image
     """
-    # define empty list
-    camera_image_midpoints = []
+    _, width, _ = image.shape
+    arrow_thickness = int(width * arrow_configs["proportions"]["thickness"])
+    arrow_colour = colour_to_uint(arrow_configs["colour"])
+    for start, end in arrow_lines:
+        cv2.line(
+            img=image, pt1=start, pt2=end,
+            color=arrow_colour, thickness=arrow_thickness, lineType=arrow_configs["line_type"],
+        )
 
-    # define point for LHS
-    if num_on_lhs > 0:
-        lhs_interval = int(total_height / (num_on_lhs + 1))
-        for i in range(num_on_lhs):
-            camera_image_midpoints.append((first_x, int((lhs_interval / 2) + (i * lhs_interval))))
+    return image
 
-    # define points for RHS
-    if num_on_rhs > 0:
-        rhs_interval = int(total_height / num_on_rhs)
-        for i in range(num_on_rhs):
-            camera_image_midpoints.append((second_x, int((rhs_interval / 2) + (i * rhs_interval))))
 
-    return camera_image_midpoints
+def get_camera_proxies(video_file_paths):
+    """
+    Function Goal : get a copy of each camera video resized to its panel in the video, made once and kept in the cache,
+                    so rendering decodes small frames and doesn't resize them
+                    the copies keep only one frame for each second if the configs ask for it and the frame rate is whole
+
+    video_file_paths : list of strings - the paths to the camera videos
+
+    return : list of strings - the paths to the copies of the camera videos
+    """
+    proxy_configs = default_configs["heatmap"]["camera_proxy"]
+    video_width, video_height = resolution_configs[video_configs["resolution"]]
+    layout = FrameCompositor(video_width, video_height, len(video_file_paths))
+    proxy_folder = os.path.join(default_configs["heatmap"]["cache_folder"], "camera_proxies")
+
+    proxy_paths = []
+    for i, path in enumerate(video_file_paths):
+        frame_step = 1
+        if proxy_configs["one_frame_per_second"]:
+            video = cv2.VideoCapture(path)
+            frame_rate = video.get(cv2.CAP_PROP_FPS)
+            video.release()
+            # the frame for each second is only a whole frame number with a whole frame rate
+            if (frame_rate >= 1) and (frame_rate == int(frame_rate)):
+                frame_step = int(frame_rate)
+        proxy_paths.append(
+            get_video_proxy(path, layout.size(f"camera_{i}"), frame_step, proxy_folder, proxy_configs["lossless"])
+        )
+    return proxy_paths
 
 
 def write_to_video(image, writer, expected_shape):
     """
     Function Goal : write the image to a video so that it is one frame of the video
 
-    image : 3D np.array - array representing the RGB values of the image we want to write
-    writer : writer object - object that allows writing to a specific video
+    image : 3D np.array of uint8 integers - array representing the BGR values of the image we want to write
+    writer : FrameSink object - where the frames of the video are written to
     expected_shape : tuple of integers (int, int, int) - expected image shape before writing
 
     return : None
     """
-    # sort the shape
+    # the layout fills the frame exactly, so any other shape is a mistake
     if image.shape != expected_shape:
-        # TODO: Fix if int(width * proportion) rounds the shape down so expected shape is 1 off
-        height, width, depth = image.shape
-        exp_height, exp_width, exp_depth = expected_shape
-        if ((exp_height - height) <= 1) or ((exp_width - width) <= 1):
-            image = cv2.resize(image, (exp_width, exp_height))
-            assert image.shape == expected_shape
-        else:
-            raise ValueError(f"Cannot write frame with shape '{image.shape}'. Expecting shape '{expected_shape}'")
-    # sort the type of the image
-    image = image if image.dtype == np.uint8 else np.uint8(image * 255)
+        raise ValueError(f"Cannot write frame with shape '{image.shape}'. Expecting shape '{expected_shape}'")
     # write the image
     writer.write(image)
 
 
-def main():
-    # get input variables
-    inputs = HeatmapInputHandler()
-    inputs.validate()
-    background_image = inputs.background_image
-    csv_file_paths = inputs.csv_file_paths
-    camera_video_file_paths = inputs.video_file_paths
-    area_details = inputs.area_details
-    event_details = inputs.event_details
-    video_output_file_path = inputs.video_output_file_path
+class HeatmapRenderer:
+    """
+    Holds everything about the heatmap video that stays the same from frame to frame and renders one frame at a time.
+    Everything it is made from can be pickled, so each worker process can make its own renderer when rendering in parallel.
+    """
 
-    start_time = time.time()
+    def __init__(self, background_image, area_details, area_names, event_details, camera_video_file_paths, colour_lut):
+        self.colour_lut = colour_lut
+        self.stats = new_render_stats()
+        self.video_width, self.video_height = resolution_configs[video_configs["resolution"]]
 
-    # resize background image and add border
-    video_width, video_height = resolution_configs[default_configs["video"]["resolution"]]
-    background_image.resize(
-        int(default_configs["video"]["proportions"]["width"]["background"] * video_width),
-        int(default_configs["video"]["proportions"]["height"]["background"] * video_height),
-    )
-    background_image.image = uint_to_float(background_image.image)
+        # create video reader object for reading CCTV videos
+        self.camera_video_objects = [open_camera_video(path) for path in camera_video_file_paths]
 
-    # dissect the area details
-    shape_objects = create_area_masks(area_details, background_image.shape)
+        # work out where each component goes in the frame
+        self.compositor = FrameCompositor(self.video_width, self.video_height, len(self.camera_video_objects))
 
-    # turn the CSV data into a dataframe
-    start_joined_df_time = time.time()
-    list_of_dfs = read_csvs_into_dataframes(csv_file_paths)
-    joined_df = process_csv_dataframes(list_of_dfs)
-    joined_df_time = time.time() - start_joined_df_time
+        # resize background image
+        background_image.resize(*self.compositor.size("heatmap"))
 
-    # create the colourmap image
-    start_colmap_time = time.time()
-    colourmap_width = int(video_width * video_configs["proportions"]["width"]["colourmap"])
-    colourmap_height = int(video_height * video_configs["proportions"]["height"]["colourmap"])
-    cmap = ColourMap(colourmap_height, colourmap_width)
-    cmap.create()
-    colmap_creation_time = time.time() - start_colmap_time
+        # dissect the area details
+        shape_objects, self.area_map = create_area_map(area_details, background_image.shape)
+        heatmap_background, self.area_background = create_heatmap_background(self.area_map, background_image.image)
+
+        # create the colourmap image
+        start_colmap_time = time.time()
+        colourmap_width, colourmap_height = self.compositor.size("colourmap")
+        colourmap_image = get_colourmap_image(colourmap_height, colourmap_width, colour_lut)
+        self.stats["colourmap"] += time.time() - start_colmap_time
+
+        # create the static layer of the frame
+        start_static_layer_time = time.time()
+        shape_centres = [shape.centre for shape in shape_objects]
+        heatmap_top, heatmap_left, _, _ = self.compositor.rects["heatmap"]
+        adjusted_shapes = [shape.adjust(x_offset=heatmap_left, y_offset=heatmap_top) for shape in shape_objects]
+        arrow_lines = get_arrow_lines(adjusted_shapes, self.compositor.camera_midpoints, self.compositor.width)
+
+        is_outline = self.area_map.outline_labels != 0
 
-    # create video reader object for reading CCTV videos
-    camera_video_objects = [VideoReader(path) for path in camera_video_file_paths]
+        def _draw_outlines_labels_and_arrows(image):
+            heatmap = self.compositor.view(image, "heatmap")
+            heatmap[is_outline] = heatmap_background[is_outline]
+            label_areas_on_background(heatmap, shape_centres, area_names)
+            draw_arrow_lines(image, arrow_lines)
 
-    # create the writer to write the image to the video
-    writer = cv2.VideoWriter(
-        filename=video_output_file_path, fourcc=cv2.VideoWriter_fourcc(*'mp4v'),
-        fps=video_configs["frame_rate"], frameSize=(video_width, video_height), isColor=True,
+        self.compositor.create(
+            heatmap_background, colourmap_image, self.area_map.area_pixels, _draw_outlines_labels_and_arrows,
+        )
+        self.stats["static layer"] += time.time() - start_static_layer_time
+
+        # define the sizes of the per-second components
+        event_box_width, event_box_height = self.compositor.size("event_box")
+        timer_width, timer_height = self.compositor.size("timer")
+        self.timer = Timer(timer_height, timer_width)
+        bar_plot_width, bar_plot_height = self.compositor.size("bar_plot")
+        self.bar_plot_component = BarPlot(bar_plot_height, bar_plot_width, area_names)
+        self.camera_sizes = [self.compositor.size(f"camera_{i}") for i in range(len(self.camera_video_objects))]
+        self.camera_prefetchers = None
+
+        # index the events and keep the event text boxes that have been drawn
+        self.event_index = create_event_index(event_details)
+        self.get_event_box = partial(get_event_box, x_width=event_box_width, y_height=event_box_height)
+
+        # the previous frame and the components it was made from, reused when their inputs don't change
+        self.last_frame = None
+        self.last_sensor_values = None
+        self.last_colour_indices = None
+        self.last_event_text = None
+        self.last_cameras_finished = False
+        self.heatmap_area_colours = None
+        self.bar_plot = None
+        self.event_box = None
+        self.camera_frames = None
+
+    def read_cameras(self, camera_frame_numbers):
+        """
+        Function Goal : read the frame from each camera video for one second and resize them to fit the video frame
+
+        camera_frame_numbers : list of numbers [float, None, ...] - the frame of each camera at this second, from the
+                                                                    frame schedule
+
+        return : list of 3D numpy arrays or None - the frame from each camera, or None if the cameras show the same
+                                                   frames as they did the last time they were read
+        """
+        read_frame_start_time = time.time()
+        cameras_finished = all(frame_number is None for frame_number in camera_frame_numbers)
+        # the frames of finished videos never change
+        same_cameras = cameras_finished and self.last_cameras_finished
+        self.last_cameras_finished = cameras_finished
+        camera_frames = None
+        if not same_cameras and self.camera_prefetchers is not None:
+            # pick up the frames the prefetchers read and resized ahead
+            camera_frames = [
+                prefetcher.get_frame(frame_number) if frame_number is not None else
+                cv2.resize(np.zeros((1, 1, 3), dtype=np.uint8), size)
+                for prefetcher, frame_number, size in zip(self.camera_prefetchers, camera_frame_numbers, self.camera_sizes)
+            ]
+            camera_frames = [add_colour_and_text_if_empty(frame) for frame in camera_frames]
+        elif not same_cameras:
+            # TODO: only read a frame from the video if there is a corresponding sensor value
+            camera_frames = read_camera_frames(self.camera_video_objects, camera_frame_numbers)
+            camera_frames = resize_camera_frames(camera_frames, self.camera_sizes)
+        self.stats["read camera frames"] += time.time() - read_frame_start_time
+        return camera_frames
+
+    def prefetch_cameras(self, frame_details):
+        """
+        Function Goal : read the camera frames for the seconds that will be rendered ahead of time, with each camera in
+                        its own thread, so 'read_cameras()' only picks up frames that are ready
+                        each camera reads up to the look ahead in the configs, fewer if the frames of all the cameras
+                        would go over the memory cap
+                        the seconds are given to the cameras as the frame details are read, a look ahead before each
+                        frame is rendered, so the frame details can be streamed
+
+        frame_details : iterable of tuples [(int, array, array, int, list), ...] - the rows of the frame schedule, in
+                                                                                   the order they will be rendered
+
+        return : generator of tuples [(int, array, array, int, list), ...] - the frame details, to render the frames from
+        """
+        prefetch_configs = default_configs["heatmap"]["camera_prefetch"]
+        if not (prefetch_configs["frames"] and self.camera_video_objects) or (self.camera_prefetchers is not None):
+            yield from frame_details
+            return
+        frame_bytes = sum(width * height * 3 for width, height in self.camera_sizes)
+        depth = max(1, min(prefetch_configs["frames"], int(prefetch_configs["memory_mb"] * 1e6) // frame_bytes))
+
+        feeds = [FrameNumberFeed() for _ in self.camera_video_objects]
+        self.camera_prefetchers = [
+            FramePrefetcher(video_obj, feed, size, depth)
+            for video_obj, feed, size in zip(self.camera_video_objects, feeds, self.camera_sizes)
+        ]
+        # give the cameras the frames of each second a look ahead before the second is rendered
+        look_ahead = deque()
+        for details in frame_details:
+            for feed, frame_number in zip(feeds, details[4]):
+                if frame_number is not None:
+                    feed.put(frame_number)
+            look_ahead.append(details)
+            if len(look_ahead) > depth:
+                yield look_ahead.popleft()
+        for feed in feeds:
+            feed.close()
+        yield from look_ahead
+
+    def render(self, second, sensor_values, colour_indices, event_id, camera_frame_numbers):
+        """
+        Function Goal : render the video frame for one second of the data, reusing the components of the previous frame
+                        whose inputs haven't changed
+                        the arguments are a row of the frame schedule
+
+        second : integer - the second that the frame is produced at
+        sensor_values : 1D numpy array of floats - the value from each csv at this second
+        colour_indices : 1D numpy array of integers - the position of each value's colour in the colour lookup table
+        event_id : integer - the position of the event text to show in the event index, or -1 if there isn't one
+        camera_frame_numbers : list of numbers [float, None, ...] - the frame of each camera at this second
+
+        return : 3D numpy array of uint8 integers - the full video frame, which is changed by the next call
+        """
+        return self.render_with_camera_frames(
+            second, sensor_values, colour_indices, event_id, camera_frame_numbers, self.read_cameras(camera_frame_numbers),
+        )
+
+    def render_with_camera_frames(
+            self, second, sensor_values, colour_indices, event_id, camera_frame_numbers, camera_frames,
+    ):
+        """
+        Function Goal : render the video frame for one second of the data from camera frames that were already read,
+                        so the cameras can be read in a different thread
+
+        second : integer - the second that the frame is produced at
+        sensor_values : 1D numpy array of floats - the value from each csv at this second
+        colour_indices : 1D numpy array of integers - the position of each value's colour in the colour lookup table
+        event_id : integer - the position of the event text to show in the event index, or -1 if there isn't one
+        camera_frame_numbers : list of numbers [float, None, ...] - the frame of each camera at this second
+        camera_frames : list of 3D numpy arrays or None - what 'read_cameras()' gave for this second
+
+        return : 3D numpy array of uint8 integers - the full video frame, which is changed by the next call
+        """
+        self.stats["frames"] += 1
+        # find what the changing components are made from this second
+        same_data = (
+            self.last_frame is not None
+            and np.array_equal(colour_indices, self.last_colour_indices)
+            and np.array_equal(sensor_values, self.last_sensor_values, equal_nan=True)
+        )
+        event_text = self.event_index.texts[event_id] if event_id >= 0 else None
+        same_event = self.last_frame is not None and event_text == self.last_event_text
+        same_cameras = self.last_frame is not None and camera_frames is None
+        self.last_sensor_values, self.last_colour_indices = sensor_values, colour_indices
+        self.last_event_text = event_text
+
+        # define timer
+        define_timer_start_time = time.time()
+        timer = self.timer.create(second)
+        self.stats["define timer"] += time.time() - define_timer_start_time
+
+        # only the timer has changed, so put it into the previous frame
+        if same_data and same_event and same_cameras:
+            compose_frame_start_time = time.time()
+            self.last_frame = self.compositor.replace("timer", timer)
+            self.stats["compose frame"] += time.time() - compose_frame_start_time
+            self.stats["reused frames"] += 1
+            return self.last_frame
+
+        # define central heatmap image
+        define_heatmap_start_time = time.time()
+        area_colours = self.colour_lut.table[colour_indices]
+        if not same_data:
+            self.heatmap_area_colours = colour_areas(self.area_map, area_colours, self.area_background)
+        self.stats["define heatmap"] += time.time() - define_heatmap_start_time
+
+        # define event text box
+        define_event_box_start_time = time.time()
+        if not same_event:
+            self.event_box = self.get_event_box(event_text)
+        self.stats["define event box"] += time.time() - define_event_box_start_time
+
+        # keep the camera frames until the cameras change
+        if not same_cameras:
+            self.camera_frames = camera_frames
+
+        # define bar plot
+        define_bar_plot_start_time = time.time()
+        if not same_data:
+            self.bar_plot = self.bar_plot_component.create(sensor_values, area_colours)
+        self.stats["define bar plot"] += time.time() - define_bar_plot_start_time
+
+        # put the per-second components on the static layer
+        compose_frame_start_time = time.time()
+        self.last_frame = self.compositor.compose(
+            self.heatmap_area_colours, self.event_box, timer, self.camera_frames, self.bar_plot,
+        )
+        self.stats["compose frame"] += time.time() - compose_frame_start_time
+
+        return self.last_frame
+
+    def pop_stats(self):
+        """
+        Function Goal : get the statistics about rendering since this was last called and start again from 0
+
+        return : dictionary of string to number {str: number, ...} - the number of frames and reused frames and the seconds spent in each stage
+        """
+        stats, self.stats = self.stats, new_render_stats()
+        return stats
+
+    def release(self):
+        # stop reading ahead before closing the videos
+        for prefetcher in self.camera_prefetchers or []:
+            prefetcher.close()
+        for obj in self.camera_video_objects:
+            obj.release()
+
+
+# the renderer each worker process uses when rendering frames in parallel
+worker_renderer = None
+
+
+def limit_worker_threads():
+    # each worker renders on its own core, so don't let OpenCV start more threads
+    cv2.setNumThreads(1)
+
+
+def start_render_worker(renderer_args):
+    global worker_renderer
+    limit_worker_threads()
+    worker_renderer = HeatmapRenderer(*renderer_args)
+
+
+def render_frame_in_worker(frame_details):
+    frame = worker_renderer.render(*frame_details)
+    return frame, worker_renderer.pop_stats()
+
+
+def render_video(
+        renderer_args, frame_details, num_frames, num_workers, output_path, sink_type="video", fourcc="mp4v",
+        show_progress=True,
+):
+    """
+    Function Goal : render each frame and write them to a video in order, with reading the cameras, composing the
+                    frames and encoding them each running in their own thread
+
+    renderer_args : tuple - the arguments to make a HeatmapRenderer from
+    frame_details : iterable of tuples [(int, array, array, int, list), ...] - the rows of the frame schedule
+    num_frames : integer - the number of frames in 'frame_details', None if it isn't known until they're read
+    num_workers : integer - the number of processes to render the frames in, 1 renders them in this process
+    output_path : string - the path to write the video to
+    sink_type : string - the kind of frame sink to write the frames with, from 'frame_sink_types'
+    fourcc : string - the code of the codec to write the video with, when writing to a video
+    show_progress : boolean - whether to show a progress bar
+
+    return : dictionary of string to number {str: number, ...} - the number of frames and reused frames, the seconds
+                                                                  spent in each stage and, under "pipeline", the seconds each thread
+                                                                  spent working and waiting
+    """
+    # create the sink to write the frames to
+    video_width, video_height = resolution_configs[video_configs["resolution"]]
+    writer = create_frame_sink(
+        sink_type, output_path, video_configs["frame_rate"], (video_width, video_height), fourcc=fourcc,
     )
+    progress_bar = tqdm(total=num_frames, disable=not show_progress)
 
-    # iterate through each row in the dataframe
-    before_iteration_time = new_start_time = time.time()
+    def encode(frame):
+        write_to_video(frame, writer, expected_shape=(video_height, video_width, 3))
+        progress_bar.update()
+        return frame
+
+    # decode, compose and encode the frames in their own threads so they overlap
+    queue_size = default_configs["heatmap"]["queue_size"]
+    stats = new_render_stats()
+    renderer = None
+    frames = None
     try:
-        for i, (timestamp, sensor_vals) in tqdm(enumerate(joined_df.iterrows()), total=len(joined_df)):
-            # define central heatmap image
-            define_heatmap_start_time = time.time()
-            coloured_shape_objects = add_colour_to_area_masks_and_merge(sensor_vals, shape_objects, cmap.mapper)
-            background_with_areas = join_shapes_to_background(coloured_shape_objects, background_image.image)
-            shape_centres = [shape.centre for shape in coloured_shape_objects]
-            csv_names = [path[-6:-4] for path in csv_file_paths]
-            heatmap = label_areas_on_background(background_with_areas, shape_centres, csv_names)
-            define_heatmap_times.append(time.time() - define_heatmap_start_time)
-
-            # define event text box
-            define_event_box_start_time = time.time()
-            event_box_height = int(video_height * video_configs["proportions"]["height"]["events_box"])
-            event_duration = int(video_configs["frame_rate"] * event_box_configs["text_duration"])
-            event_box = create_event_text_box(
-                int(timestamp.timestamp()), event_details, heatmap.shape[1], event_box_height, event_duration,
+        if num_workers > 1:
+            # give each worker process its own renderer - the workers decode and compose the frames
+            frames = map_in_order(
+                render_frame_in_worker, frame_details, num_workers,
+                initializer=start_render_worker, initargs=(renderer_args,),
             )
-            define_event_box_times.append(time.time() - define_event_box_start_time)
-
-            # define timer
-            define_timer_start_time = time.time()
-            timer_width = int(video_width * video_configs["proportions"]["width"]["timer"])
-            timer = create_timer(int(timestamp.timestamp()), timer_width, colourmap_height)
-            define_timer_times.append(time.time() - define_timer_start_time)
-
-            # merge central heatmap components
-            central_merge_start_time = time.time()
-            top_component = np.concatenate((event_box, heatmap), axis=0)
-            bottom_component = np.concatenate((cmap.image, timer), axis=1)
-            main_heatmap_component = np.concatenate((top_component, bottom_component), axis=0)
-            central_merge_times.append(time.time() - central_merge_start_time)
-
-            # read the camera video frames
-            read_frame_start_time = time.time()
-            camera_video_width = int(video_width * video_configs["proportions"]["width"]["cameras"])
-            # TODO: only read a frame from the video if there is a corresponding sensor value
-            camera_frames = read_camera_frames(camera_video_objects, int(timestamp.timestamp()))
-            lhs_cam_frames, rhs_cam_frames, lhs_cam_height = get_lhs_and_rhs_frames(
-                camera_frames, camera_video_width, main_heatmap_component.shape[0],
+
+            def collect(rendered):
+                frame, frame_stats = rendered
+                add_stats(stats, frame_stats)
+                return frame
+
+            stages = [("render in workers", collect), ("encode", encode)]
+
+        else:
+            renderer = HeatmapRenderer(*renderer_args)
+            # the cameras are read ahead, so they're told each second before it is rendered
+            frame_details = renderer.prefetch_cameras(frame_details)
+            # the renderer composes every frame in the same buffer, so each frame is copied into a buffer of its own
+            # until it is encoded - there is always one free as no more frames than this are waiting or being encoded
+            free_buffers = queue.Queue()
+            for _ in range(queue_size + 2):
+                free_buffers.put(np.empty((video_height, video_width, 3), dtype=np.uint8))
+
+            def decode(details):
+                return details, renderer.read_cameras(details[4])
+
+            def compose(decoded):
+                details, camera_frames = decoded
+                frame = renderer.render_with_camera_frames(*details, camera_frames)
+                buffer = free_buffers.get()
+                np.copyto(buffer, frame)
+                return buffer
+
+            def encode_and_free(frame):
+                free_buffers.put(encode(frame))
+
+            frames = frame_details
+            stages = [("decode", decode), ("compose", compose), ("encode", encode_and_free)]
+
+        stats["pipeline"] = run_pipeline(frames, stages, queue_size)
+    finally:
+        progress_bar.close()
+        # stop the workers and release the camera video objects
+        if num_workers > 1 and frames is not None:
+            frames.close()
+        if renderer is not None:
+            add_stats(stats, renderer.pop_stats())
+            renderer.release()
+        # release the frame sink
+        writer.release()
+
+    return stats
+
+
+def render_segment(segment):
+    limit_worker_threads()
+    renderer_args, frame_details, segment_path, fourcc = segment
+    return render_video(
+        renderer_args, frame_details, len(frame_details), 1, segment_path, "video", fourcc, show_progress=False,
+    )
+
+
+def get_render_key(renderer_args, frame_details, bounds, segment_format):
+    """
+    Function Goal : make a key of everything the frames of a segmented render are made from, so the segments finished
+                    by an earlier try are only used again for the same render
+
+    renderer_args : tuple - the arguments to make a HeatmapRenderer from
+    frame_details : iterable of tuples [(int, array, array, int, list), ...] - the rows of the frame schedule
+    bounds : 1D numpy array of integers - the frame each segment starts at, then the number of frames
+    segment_format : tuple of strings (str, str) - the file extension and the fourcc code the segments are written with
+
+    return : string - the key
+    """
+    background_image, area_details, area_names, event_details, camera_video_file_paths, colour_lut = renderer_args
+    cameras = [
+        (os.path.realpath(path), os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in camera_video_file_paths
+    ]
+    key = hashlib.sha1(json.dumps(
+        [
+            area_details, area_names, sorted(event_details.items()), cameras, background_image.shape,
+            colour_lut.min_value, colour_lut.max_value, default_configs, heatmap_configs, resolution_configs,
+            bounds.tolist(), segment_format,
+        ],
+        sort_keys=True, default=str,
+    ).encode())
+    key.update(background_image.image.tobytes())
+    key.update(colour_lut.table.tobytes())
+    for second, sensor_values, colour_indices, event_id, camera_frame_numbers in frame_details:
+        key.update(repr((second, event_id, camera_frame_numbers)).encode())
+        key.update(sensor_values.tobytes())
+        key.update(colour_indices.tobytes())
+    return key.hexdigest()
+
+
+def render_video_in_segments(
+        renderer_args, frame_details, num_segments, num_workers, output_path, checkpoint=False, show_progress=True,
+):
+    """
+    Function Goal : split the frames into contiguous segments, render each segment to its own video in a separate
+                    process and then join the segments together
+                    each segment opens its own camera videos and reads them in order from the start of the segment,
+                    and a segment that fails is the only one rendered again
+                    with a checkpoint, the segments are kept in a folder next to the video until they're joined, so
+                    running the same render again after it stopped part way through only renders the unfinished ones
+
+    renderer_args : tuple - the arguments to make a HeatmapRenderer from
+    frame_details : FrameSchedule object or list of tuples [(int, array, array, int, list), ...] - the rows of the
+                                                                                                   frame schedule
+    num_segments : integer - the number of segments to split the frames into
+    num_workers : integer - the number of segments to render at once
+    output_path : string - the path to write the joined video to
+    checkpoint : boolean - whether to keep the finished segments between runs
+    show_progress : boolean - whether to show a progress bar
+
+    return : dictionary of string to number {str: number, ...} - the stats from 'render_video()' added up over the
+                                                                  segments that were rendered, with the frames of the
+                                                                  segments kept from an earlier try counted under
+                                                                  "frames" and "checkpointed frames"
+    """
+    # there's nothing to split when there are no frames, so write the empty video as an unsplit render does
+    if len(frame_details) == 0:
+        return render_video(renderer_args, frame_details, 0, 1, output_path, show_progress=show_progress)
+
+    # split the frames into segments
+    num_segments = min(num_segments, len(frame_details))
+    bounds = np.linspace(0, len(frame_details), num_segments + 1).astype(int)
+    segment_ext, segment_fourcc = get_segment_format()
+    render_checkpoint = None
+    if checkpoint:
+        render_checkpoint = RenderCheckpoint.load(
+            output_path + ".checkpoint", get_render_key(renderer_args, frame_details, bounds, (segment_ext, segment_fourcc)),
+        )
+        segment_folder = render_checkpoint.folder
+    else:
+        segment_folder = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    segment_paths = [os.path.join(segment_folder, f"segment_{i:04}.{segment_ext}") for i in range(num_segments)]
+    # only render the segments that an earlier try didn't finish
+    segment_numbers = [
+        i for i in range(num_segments)
+        if render_checkpoint is None or not render_checkpoint.is_finished(segment_paths[i], bounds[i + 1] - bounds[i])
+    ]
+    segments = [
+        (renderer_args, frame_details[bounds[i]:bounds[i + 1]], segment_paths[i], segment_fourcc)
+        for i in segment_numbers
+    ]
+    finished_frames = len(frame_details) - sum(bounds[i + 1] - bounds[i] for i in segment_numbers)
+    if finished_frames:
+        print(f"Carrying on from the {finished_frames} frames finished by an earlier try.")
+
+    # render the segments and join them together
+    stats = new_render_stats()
+    try:
+        with tqdm(total=len(frame_details), initial=finished_frames, disable=not show_progress) as progress_bar:
+            rendered = map_with_retries(
+                render_segment, segments, num_workers, max_retries=default_configs["heatmap"]["segment_retries"],
             )
-            read_frame_times.append(time.time() - read_frame_start_time)
-
-            # define bar plot
-            define_bar_plot_start_time = time.time()
-            area_colours = [shape.fill_colour for shape in coloured_shape_objects]
-            bar_plot = create_bar_plot(sensor_vals, camera_video_width, lhs_cam_height, csv_names, area_colours)
-            define_bar_plot_times.append(time.time() - define_bar_plot_start_time)
-
-            # merge side components
-            side_merge_start_time = time.time()
-            lhs_component = np.concatenate((np.concatenate(lhs_cam_frames, axis=0), bar_plot), axis=0)
-            rhs_component = np.concatenate(rhs_cam_frames, axis=0)
-            all_components = np.concatenate((lhs_component, main_heatmap_component, rhs_component), axis=1)
-            side_merge_times.append(time.time() - side_merge_start_time)
-
-            # draw arrows on the images joining the camera footage videos with their respective area on the heatmap
-            draw_arrows_start_time = time.time()
-            camera_midpoints = get_camera_image_midpoints(
-                camera_video_width, (camera_video_width + main_heatmap_component.shape[1]),
-                len(lhs_cam_frames), len(rhs_cam_frames), lhs_component.shape[0],
+            for position, segment_stats in rendered:
+                i = segment_numbers[position]
+                add_stats(stats, segment_stats)
+                if render_checkpoint is not None:
+                    render_checkpoint.mark_finished(segment_paths[i], int(bounds[i + 1] - bounds[i]))
+                progress_bar.update(bounds[i + 1] - bounds[i])
+        # the frames of the segments kept from an earlier try are in the video too
+        stats["frames"] += finished_frames
+        stats["checkpointed frames"] += finished_frames
+        video_width, video_height = resolution_configs[video_configs["resolution"]]
+        stitch_videos(segment_paths, output_path, video_configs["frame_rate"], (video_width, video_height))
+        if render_checkpoint is not None:
+            render_checkpoint.remove()
+    finally:
+        # the segments of a checkpoint are kept until they're joined
+        if render_checkpoint is None:
+            shutil.rmtree(segment_folder, ignore_errors=True)
+
+    return stats
+
+
+def make_heatmap_video(inputs, show_progress=True):
+    """
+    Function Goal : make a heatmap video from a set of inputs
+
+    inputs : HeatmapInputHandler object - the checked inputs of the video
+    show_progress : boolean - whether to show a progress bar
+
+    return : dictionary of string to number {str: number, ...} - the stats from rendering, with the seconds spent before
+                                                                  rendering and rendering under "before rendering" and
+                                                                  "rendering" and the seconds spent reading the csvs
+                                                                  under "csv data"
+    """
+    background_image = inputs.background_image
+    csv_file_paths = inputs.csv_file_paths
+    camera_video_file_paths = inputs.video_file_paths
+    area_details = inputs.area_details
+    event_details = inputs.event_details
+    video_output_file_path = inputs.video_output_file_path
+    num_workers = inputs.num_workers
+    num_segments = inputs.num_segments
+    frame_sink = inputs.frame_sink
+    window_start = inputs.start_time
+    window_end = inputs.end_time
+
+    start_time = time.time()
+    # swap the camera videos for copies at the size of their panels
+    if default_configs["heatmap"]["camera_proxy"]["enabled"]:
+        camera_video_file_paths = get_camera_proxies(camera_video_file_paths)
+
+    # index the camera videos once here, so the renderers in the workers all read the same stored index
+    if default_configs["heatmap"]["camera_index"]:
+        for path in camera_video_file_paths:
+            VideoIndex.load(path)
+
+    # work out what each frame is made from
+    start_joined_df_time = time.time()
+    colour_lut = get_colour_lut()
+    event_index = create_event_index(event_details)
+    camera_timings = get_camera_timings(camera_video_file_paths)
+    stream_csvs = default_configs["heatmap"]["stream_csvs"]
+    if stream_csvs:
+        # check the start of each CSV is in time order, which is all that's read so the first frame isn't held up
+        # a CSV that's only out of order further on stops the render there, saying to read the CSVs whole instead
+        unsorted_paths = [path for path in csv_file_paths if not can_stream_csv(path, data_configs["columns"])]
+        if unsorted_paths:
+            print(
+                f"WARNING: The CSVs {unsorted_paths} don't start sorted by time, so they're read whole instead of "
+                f"streamed."
             )
-            adjusted_shapes = [
-                shape.adjust(x_offset=camera_video_width, y_offset=event_box_height)
-                for shape in coloured_shape_objects
-            ]
-            final_image = draw_arrows_from_cameras_to_shapes(all_components, adjusted_shapes, camera_midpoints)
-            draw_arrows_times.append(time.time() - draw_arrows_start_time)
+            stream_csvs = False
+    if stream_csvs:
+        # read the CSVs as the frames are rendered, scheduling a chunk of seconds at a time
+        num_frames = None
+        rows = stream_csv_data(csv_file_paths, data_configs["columns"])
+        # the seconds before the window are still read for the values they fill forward, but reading stops at its end
+        if window_end is not None:
+            rows = takewhile(lambda row: row[0] < window_end, rows)
+        if window_start is not None:
+            rows = dropwhile(lambda row: row[0] < window_start, rows)
+        frame_schedules = FrameSchedule.create_in_chunks(rows, colour_lut, event_index, camera_timings)
+        frame_details = (details for frame_schedule in frame_schedules for details in frame_schedule)
+    else:
+        joined_df = load_csv_data(csv_file_paths, window_start, window_end)
+        # the second of each row, rounded as 'Timestamp.timestamp()' rounds it
+        seconds = np.trunc(np.round(joined_df.index.asi8 / 1e9, 6))
+        # only take the rows in the window, which are all that's read of a memory mapped DataFrame
+        start, end = get_window_bounds(seconds, window_start, window_end)
+        frame_details = FrameSchedule.create(
+            seconds[start:end], joined_df.iloc[start:end].to_numpy(), colour_lut, event_index, camera_timings,
+        )
+        num_frames = len(frame_details)
+    joined_df_time = time.time() - start_joined_df_time
+    csv_names = [path[-6:-4] for path in csv_file_paths]
+    renderer_args = (background_image, area_details, csv_names, event_details, camera_video_file_paths, colour_lut)
+
+    # render the video
+    before_iteration_time = time.time()
+    checkpoint_frames = default_configs["heatmap"]["checkpoint_frames"]
+    if (num_segments > 1) or checkpoint_frames:
+        if num_frames is None:
+            frame_details = list(frame_details)
+        # a checkpoint finishes a segment at least every 'checkpoint_frames' frames
+        if checkpoint_frames:
+            num_segments = max(num_segments, -(-len(frame_details) // checkpoint_frames))
+        stats = render_video_in_segments(
+            renderer_args, frame_details, num_segments, num_workers, video_output_file_path,
+            checkpoint=bool(checkpoint_frames), show_progress=show_progress,
+        )
+    else:
+        stats = render_video(
+            renderer_args, frame_details, num_frames, num_workers, video_output_file_path, frame_sink,
+            show_progress=show_progress,
+        )
+    stats["csv data"] = joined_df_time
+    stats["before rendering"] = before_iteration_time - start_time
+    stats["rendering"] = time.time() - before_iteration_time
+    return stats
 
-            # write the images to the video
-            write_to_video(final_image, writer, expected_shape=(video_height, video_width, 3))
 
-            loop_times.append(time.time() - new_start_time)
-            new_start_time = time.time()
+def main():
+    # get input variables
+    inputs = HeatmapInputHandler()
+    inputs.validate()
 
-    except Exception as e:
-        raise e
+    # keep stdout for the frames when they're written to it
+    if (inputs.frame_sink in ["raw", "y4m"]) and (inputs.video_output_file_path == "-"):
+        sys.stdout = sys.stderr
 
-    finally:
-        # release the camera video objects
-        for obj in camera_video_objects:
-            obj.release()
-        # release the output video object
-        writer.release()
-        print("The video was written to the file with the name '" + video_output_file_path + "'.")
-        # print timings
-        print("---- BEFORE LOOPING ----")
-        print("colourmap = {}".format(colmap_creation_time))
-        print("joined_df = {}".format(joined_df_time))
-        print("time before iteration = {}".format(before_iteration_time - start_time))
-        print("---- IN LOOP ----")
-        print("define heatmap = {}".format(sum(define_heatmap_times)))
-        print("define event box = {}".format(sum(define_event_box_times)))
-        print("define timer = {}".format(sum(define_timer_times)))
-        print("merge central heatmap = {}".format(sum(central_merge_times)))
-        print("read camera frames = {}".format(sum(read_frame_times)))
-        print("define bar plot = {}".format(sum(define_bar_plot_times)))
-        print("merge side heatmap = {}".format(sum(side_merge_times)))
-        print("draw arrows = {}".format(sum(draw_arrows_times)))
-        print("---- TOTAL ----")
-        print("Avg loop time = {}".format(np.mean(loop_times)))
-        print("Time taken = {}".format(time.time() - start_time))
+    start_time = time.time()
+    stats = make_heatmap_video(inputs)
+    if inputs.frame_sink == "null":
+        print("The frames were rendered and thrown away.")
+    else:
+        print("The video was written to the file with the name '" + inputs.video_output_file_path + "'.")
+
+    # print timings
+    num_frames = stats.pop("frames")
+    reused_frames = stats.pop("reused frames")
+    checkpointed_frames = stats.pop("checkpointed frames")
+    pipeline_stats = stats.pop("pipeline")
+    joined_df_time = stats.pop("csv data")
+    before_iteration_time = stats.pop("before rendering")
+    render_time = stats.pop("rendering")
+    print("---- BEFORE LOOPING ----")
+    print("joined_df = {}".format(joined_df_time))
+    print("time before iteration = {}".format(before_iteration_time))
+    print("---- IN LOOP ----" if inputs.num_workers == 1 else f"---- IN LOOP (summed over {inputs.num_workers} workers) ----")
+    for stage, duration in stats.items():
+        print("{} = {}".format(stage, duration))
+    print("---- PIPELINE (share of each stage's time) ----")
+    for stage, durations in pipeline_stats.items():
+        stage_time = sum(durations.values()) or 1
+        print("{} = {}".format(stage, ", ".join(
+            "{} {:.0%}".format(state, duration / stage_time) for state, duration in durations.items()
+        )))
+    print("---- TOTAL ----")
+    print("Reused frames = {} of {}".format(reused_frames, num_frames))
+    if checkpointed_frames:
+        print("Frames kept from an earlier try = {} of {}".format(checkpointed_frames, num_frames))
+    print("Avg loop time = {}".format(render_time / max(num_frames - checkpointed_frames, 1)))
+    print("Time taken = {}".format(time.time() - start_time))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+# import libraries
+import numpy as np
+
+
+class AreaMap:
+    """
+    Stores where every area is on an image as integer label images so all the areas can be coloured in one pass.
+
+    Each pixel inside at least one area has a region label. A region is the set of areas covering the pixel, and its
+    colour is the running mean of the colours of those areas, in the order the areas are given.
+    """
+
+    def __init__(self, shapes, img_size, outline_thickness=1):
+        self.height, self.width = img_size[:2]
+        self.num_areas = len(shapes)
+        self.region_labels = np.zeros((self.height, self.width), dtype=np.int32)
+        self.outline_labels = np.zeros((self.height, self.width), dtype=np.int32)
+        self.region_weights = None
+        self.area_pixels = None
+        self.pixel_regions = None
+        self._rasterise(shapes, outline_thickness)
+
+    def _rasterise(self, shapes, outline_thickness):
+        # region 0 is the background, which has no areas
+        region_weights = [np.zeros(self.num_areas)]
+        canvas = np.zeros((self.height, self.width), dtype=np.uint8)
+        for area_index, shape in enumerate(shapes):
+
+            # find the regions this area covers
+            canvas[:] = 0
+            shape.draw(canvas, 1)
+            inside = canvas != 0
+            old_regions, positions = np.unique(self.region_labels[inside], return_inverse=True)
+
+            # split each of them into a new region that also contains this area
+            new_regions = np.arange(len(old_regions), dtype=np.int32) + len(region_weights)
+            for old_region in old_regions:
+                # take this area's colour if it is the first, otherwise mean it with the colour so far
+                weights = region_weights[old_region] / 2
+                weights[area_index] = 1 if old_region == 0 else 0.5
+                region_weights.append(weights)
+            self.region_labels[inside] = new_regions[positions]
+
+            # label the outline with the first area drawn there
+            canvas[:] = 0
+            shape.draw(canvas, 1, thickness=outline_thickness)
+            self.outline_labels[(canvas != 0) & (self.outline_labels == 0)] = area_index + 1
+
+        self.region_weights = np.array(region_weights)
+        self.area_pixels = np.flatnonzero(self.region_labels)
+        self.pixel_regions = self.region_labels.ravel()[self.area_pixels]
+
+    def colour_pixels(self, area_colours):
+        """
+        Function Goal : find the colour of every pixel inside the areas
+
+        area_colours : 2D numpy array - the colour of each area, one row per area
+
+        return : 2D numpy array - the colour of each pixel in 'area_pixels', one row per pixel, in the colours' type
+        """
+        area_colours = np.asarray(area_colours)
+        region_colours = self.region_weights @ area_colours
+        if np.issubdtype(area_colours.dtype, np.integer):
+            region_colours = np.rint(region_colours)
+        return region_colours.astype(area_colours.dtype)[self.pixel_regions]
@@ -0,0 +1,49 @@
+# import libraries
+import matplotlib
+import numpy as np
+
+
+class ColourLUT:
+    """
+    Lookup table of the colours a matplotlib colourmap gives to values between a minimum and a maximum.
+    The value range is split into a fixed number of colours so whole rows or matrices of values can be coloured at once.
+    The colours are stored as uint8 BGR values and the last colour in the table is the colour given to NaN values.
+    """
+
+    def __init__(self, cmap_name, min_value, max_value, num_colours=1024, nan_colour=(0, 0, 0)):
+        if not 0 < num_colours < np.iinfo(np.uint16).max:
+            raise ValueError(f"The number of colours in the lookup table must be between 1 and 65534, not {num_colours}.")
+        self.min_value = min_value
+        self.max_value = max_value
+        self.num_colours = num_colours
+
+        # sample the colourmap at the centre of each bucket and turn RGBA to BGR
+        cmap = matplotlib.colormaps[cmap_name]
+        bucket_centres = (np.arange(num_colours) + 0.5) / num_colours
+        colours = cmap(bucket_centres, bytes=True)[:, :3][:, ::-1]
+        self.table = np.concatenate((colours, [nan_colour]), axis=0).astype(np.uint8)
+
+    def to_indices(self, values):
+        """
+        Function Goal : find the position of the colour for each value in the lookup table
+
+        values : numpy array or DataFrame of floats - the values to colour, of any shape
+
+        return : numpy array of integers - the same shape as values, NaN values point to the NaN colour
+        """
+        values = np.asarray(values, dtype=float)
+        normalised = (values - self.min_value) / (self.max_value - self.min_value)
+        is_nan = np.isnan(normalised)
+        indices = np.floor(np.where(is_nan, 0, normalised) * self.num_colours)
+        indices = np.clip(indices, 0, self.num_colours - 1)
+        return np.where(is_nan, self.num_colours, indices).astype(np.uint16)
+
+    def to_bgr(self, values):
+        """
+        Function Goal : colour each value
+
+        values : numpy array or DataFrame of floats - the values to colour, of any shape
+
+        return : numpy array of uint8 integers - the values' shape with an extra last axis for the BGR colour
+        """
+        return self.table[self.to_indices(values)]
@@ -0,0 +1,29 @@
+# import libraries
+import numpy as np
+
+
+class EventIndex:
+    """
+    Stores the seconds events happen at in sorted order so the event to show at any second is found with a binary search.
+    An event is shown from its second until 'event_duration' after it, or until the next event starts.
+    """
+
+    def __init__(self, events_dict, event_duration):
+        self.event_duration = event_duration
+        self.seconds = sorted(events_dict)
+        self.texts = [events_dict[sec] for sec in self.seconds]
+
+    def find_ids(self, seconds):
+        """
+        Function Goal : find the event to show at each of many seconds at once
+
+        seconds : 1D numpy array of integers - the seconds that the frames are produced at
+
+        return : 1D numpy array of integers - the position of each second's event in 'texts', or -1 if there isn't one
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if not self.seconds:
+            return np.full(len(seconds), -1)
+        positions = np.searchsorted(self.seconds, seconds, side="right") - 1
+        event_seconds = np.asarray(self.seconds)[np.maximum(positions, 0)]
+        return np.where((positions >= 0) & (event_seconds >= seconds - self.event_duration), positions, -1)
@@ -0,0 +1,93 @@
+# import libraries
+import math
+from itertools import islice
+
+import numpy as np
+
+
+class FrameSchedule:
+    """
+    What each frame of the heatmap video is made from, worked out for every frame up front and kept in one array for
+    each kind of detail, so rendering a frame only takes a row from each array.
+    A row of the schedule is a frame's second, the value and colour of each area, the event shown and the frame of
+    each camera.
+    """
+
+    def __init__(self, seconds, sensor_values, colour_indices, event_ids, camera_frame_numbers):
+        self.seconds = seconds
+        self.sensor_values = sensor_values
+        self.colour_indices = colour_indices
+        self.event_ids = event_ids
+        self.camera_frame_numbers = camera_frame_numbers
+
+    @staticmethod
+    def create(seconds, sensor_values, colour_lut, event_index, camera_timings):
+        """
+        Function Goal : work out the schedule of a run of frames
+
+        seconds : 1D numpy array of integers - the second of each frame
+        sensor_values : 2D numpy array of floats - the value of each area at each frame's second
+        colour_lut : ColourLUT object - the colours the values are shown in
+        event_index : EventIndex object - the events to show
+        camera_timings : list of tuples [(float, int), ...] - the frame rate and number of frames of each camera video
+
+        return : FrameSchedule object
+        """
+        seconds = np.ascontiguousarray(seconds, dtype=np.int64)
+        sensor_values = np.ascontiguousarray(sensor_values, dtype=float)
+        # a camera shows the frame at its frame rate times the second, or nothing once its video has finished
+        camera_frame_numbers = np.full((len(seconds), len(camera_timings)), np.nan)
+        for i, (frame_rate, nframes) in enumerate(camera_timings):
+            frame_numbers = frame_rate * seconds.astype(float)
+            camera_frame_numbers[:, i] = np.where(frame_numbers < nframes, frame_numbers, np.nan)
+        return FrameSchedule(
+            seconds, sensor_values, colour_lut.to_indices(sensor_values), event_index.find_ids(seconds),
+            camera_frame_numbers,
+        )
+
+    @staticmethod
+    def create_in_chunks(rows, colour_lut, event_index, camera_timings, chunk_size=1024):
+        """
+        Function Goal : work out the schedule of frames as their rows are read, a chunk of frames at a time
+
+        rows : iterable of tuples [(int, 1D numpy array of floats), ...] - the second of each frame and the value of
+                                                                            each area then
+        colour_lut : ColourLUT object - the colours the values are shown in
+        event_index : EventIndex object - the events to show
+        camera_timings : list of tuples [(float, int), ...] - the frame rate and number of frames of each camera video
+        chunk_size : integer - the number of frames in each schedule
+
+        return : generator of FrameSchedule objects - the schedule of each chunk of frames, in order
+        """
+        rows = iter(rows)
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            seconds, sensor_values = zip(*chunk)
+            yield FrameSchedule.create(seconds, np.stack(sensor_values), colour_lut, event_index, camera_timings)
+            chunk = list(islice(rows, chunk_size))
+
+    def __len__(self):
+        return len(self.seconds)
+
+    def __getitem__(self, frames):
+        # a slice of the schedule is the schedule of those frames
+        return FrameSchedule(
+            self.seconds[frames], self.sensor_values[frames], self.colour_indices[frames], self.event_ids[frames],
+            self.camera_frame_numbers[frames],
+        )
+
+    def __iter__(self):
+        """
+        Function Goal : give the details of each frame in order, which are the arguments to render the frame from
+
+        return : generator of tuples [(int, array, array, int, list), ...] - the second, the value and colour index of
+                                                                            each area, the position of the event text
+                                                                            or -1, and the frame number of each camera
+                                                                            or None if it has finished
+        """
+        rows = zip(self.seconds, self.sensor_values, self.colour_indices, self.event_ids, self.camera_frame_numbers)
+        for second, sensor_values, colour_indices, event_id, camera_frame_numbers in rows:
+            yield (
+                int(second), sensor_values, colour_indices, int(event_id),
+                [None if math.isnan(frame_number) else frame_number for frame_number in camera_frame_numbers.tolist()],
+            )
@@ -0,0 +1,184 @@
+# import libraries
+import math
+import os.path
+from functools import lru_cache
+
+import cv2
+import numpy as np
+import yaml
+# import utilities
+from utils.cv2_config import cv2_dict
+
+# read the font configuration variables
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+with open(os.path.join(root_dir, "configs", "heatmap_configs.yaml"), "r") as heatmap_config_file:
+    font_configs = yaml.load(heatmap_config_file, Loader=yaml.FullLoader)["fonts"]
+
+# OpenCV places the characters of text in fixed point numbers with 16 bits for the fraction of a pixel
+XY_SHIFT = 16
+XY_ONE = 1 << XY_SHIFT
+
+
+class GlyphAtlas:
+    """
+    The characters of an OpenCV font, each drawn once at a fixed size and thickness. Text is drawn by blending the stored
+    characters into place, which gives the text 'cv2.putText()' draws without drawing every stroke again.
+
+    'cv2.putText()' moves each character along by a fraction of a pixel, so a character is stored once for each fraction
+    of a pixel it is drawn at. A character is drawn at its exact fraction of a pixel by drawing the text before it
+    first, then enough spaces to move that text a whole number of pixels off the left of the drawing.
+
+    Each character is blended in on its own rather than stroke by stroke, so the text is within 2 grey levels of
+    'cv2.putText()', except along the edge of an image the text runs off, where 'cv2.putText()' clips its strokes.
+    """
+
+    def __init__(self, font, size, thickness, line_type):
+        self.font = font
+        self.size = size
+        self.thickness = thickness
+        self.line_type = line_type
+        # leave room around each character for its thickness and anti-aliasing
+        self.pad = thickness + 2
+        (_, self.text_height), self.baseline = cv2.getTextSize("0", font, size, thickness=thickness)
+        self.scale = int(round(size * XY_ONE))
+        self.glyphs = {}
+        self.coverages = {}
+        self.units = {}
+        self.layouts = {}
+
+        # the number of spaces that moves text along a whole number of pixels
+        space_step = self._units(" ") * self.scale
+        self.num_spaces = XY_ONE // math.gcd(space_step, XY_ONE)
+
+    def _units(self, char):
+        """
+        Function Goal : get how far a character moves the text along, in the units of the font
+
+        char : string - one character
+
+        return : integer - the width of the character in font units
+        """
+        if char not in self.units:
+            # measure many copies of the character so the rounding of the width to a whole pixel doesn't matter
+            width = cv2.getTextSize(char * 100, self.font, self.size, thickness=self.thickness)[0][0] - self.thickness
+            self.units[char] = int(round(width / (100 * self.size)))
+        return self.units[char]
+
+    def text_size(self, text):
+        """
+        Function Goal : get the size of some text, the same as 'cv2.getTextSize()'
+
+        text : string - the text
+
+        return : tuple of integers (int, int) - the width and height of the text above its baseline
+        """
+        return cv2.getTextSize(text, self.font, self.size, thickness=self.thickness)[0]
+
+    def _phase(self, prefix):
+        # the fraction of a pixel, in fixed point, that a character is drawn at after some text
+        return (sum(self._units(char) for char in prefix) * self.scale) % XY_ONE
+
+    def glyph(self, char, prefix=""):
+        """
+        Function Goal : get the stored drawing of a character, drawing and storing it the first time
+
+        char : string - one character
+        prefix : string - the text before the character, which sets the fraction of a pixel it is drawn at
+
+        return : 2D numpy array of uint8 integers - how much of each pixel the character covers from 0 to 255, with the
+                                                    character 'pad' pixels and the prefix's fraction of a pixel in from
+                                                    the left and its baseline 'pad' pixels below the text height
+        """
+        phase = self._phase(prefix)
+        if (char, phase) not in self.glyphs:
+            width = int(np.ceil(self._units(char) * self.size)) + (2 * self.pad) + 1
+            height = self.text_height + self.baseline + (2 * self.pad)
+            mask = np.zeros((height, width), dtype=np.uint8)
+            # start the prefix and spaces off the left of the mask so only the character lands on it
+            prefix = prefix + (" " * self.num_spaces)
+            prefix_width = (sum(self._units(c) for c in prefix) * self.scale - phase) // XY_ONE
+            cv2.putText(
+                mask, prefix + char, (self.pad - prefix_width, self.pad + self.text_height),
+                self.font, self.size, color=255, lineType=self.line_type, thickness=self.thickness,
+            )
+            self.glyphs[(char, phase)] = mask
+        return self.glyphs[(char, phase)]
+
+    def layout(self, text, origin):
+        """
+        Function Goal : find where each character of some text goes and which stored drawing of it to use
+
+        text : string - the text
+        origin : tuple of integers (int, int) - the bottom left corner of the text, as in 'cv2.putText()'
+
+        return : list of tuples of integers [(int, int, int, int, int), ...] - the top, left, bottom and right of each
+                                                                                character's drawing and the fraction of
+                                                                                a pixel it is drawn at
+        """
+        # characters with the same widths go in the same places, so only work the places out once
+        char_units = tuple(self._units(char) for char in text)
+        if (char_units, origin) not in self.layouts:
+            places = []
+            position = origin[0] * XY_ONE
+            for units in char_units:
+                phase = position % XY_ONE
+                places.append(((position - phase) // XY_ONE - self.pad, phase))
+                position += units * self.scale
+            self.layouts[(char_units, origin)] = places
+
+        top = origin[1] - self.text_height - self.pad
+        spans = []
+        for i, (left, phase) in enumerate(self.layouts[(char_units, origin)]):
+            height, width = self.glyph(text[i], text[:i]).shape
+            spans.append((top, left, top + height, left + width, phase))
+        return spans
+
+    def draw(self, image, text, origin, colour, x_range=None):
+        """
+        Function Goal : draw text onto an image, in place
+
+        image : 3D numpy array of uint8 integers - the image to draw on
+        text : string - the text to draw
+        origin : tuple of integers (int, int) - the bottom left corner of the text, as in 'cv2.putText()'
+        colour : list of integers [int, int, int] - the BGR colour of the text from 0 to 255
+        x_range : tuple of integers (int, int) - only draw the columns of the image from the first to before the second
+
+        return : None
+        """
+        img_height, img_width = image.shape[:2]
+        x_start, x_end = x_range if x_range is not None else (0, img_width)
+        x_start, x_end = max(x_start, 0), min(x_end, img_width)
+        colour = np.array(colour, dtype=np.int32)
+        for i, (top, left, bottom, right, phase) in enumerate(self.layout(text, origin)):
+            # clip the character to the image and the range of columns
+            y0, y1 = max(top, 0), min(bottom, img_height)
+            x0, x1 = max(left, x_start), min(right, x_end)
+            if (y0 >= y1) or (x0 >= x1):
+                continue
+            if (text[i], phase) not in self.coverages:
+                self.coverages[(text[i], phase)] = self.glyph(text[i], text[:i])[:, :, np.newaxis].astype(np.int32)
+            coverage = self.coverages[(text[i], phase)][y0 - top:y1 - top, x0 - left:x1 - left]
+            # blend the colour in by how much of each pixel the character covers
+            region = image[y0:y1, x0:x1]
+            region[:] = region + (((colour - region) * coverage + 127) // 255)
+
+
+@lru_cache(maxsize=None)
+def get_glyph_atlas(font_name, width):
+    """
+    Function Goal : get the drawn characters of a font from the font configurations, at the size it is used on a
+                    component of a particular width
+                    the characters are drawn once in each process, and shared by every component using the same font
+                    at the same width
+
+    font_name : string - the key of the font in the font configurations
+    width : integer - the width of the component the text is drawn on
+
+    return : GlyphAtlas object
+    """
+    return GlyphAtlas(
+        cv2_dict[font_configs[font_name]["type"]],
+        width * font_configs[font_name]["proportions"]["size"],
+        int(width * font_configs[font_name]["proportions"]["thickness"]),
+        cv2_dict[font_configs[font_name]["line_type"]],
+    )
@@ -3,19 +3,14 @@ import cv2
 import numpy as np
 
 # import utilities
-from utils.maths_utils import generate_points_on_shape_boundary, get_closest_point_between_points, \
-    get_distance_to_point, get_ratio_interval_point
+from utils.maths_utils import get_closest_points_on_polygon, get_distance_to_point, get_ratio_interval_point, \
+    intersect_segments_with_polygon
 
 
 class Shape:
     def __init__(self, shape_type):
         self.type = shape_type
         self.centre = None
-        self.filled_mask = None
-        self.fill_colour = None
-        self.outline_mask = None
-        self.outline_colour = None
-        self.merged_mask = None
 
     @staticmethod
     def from_dict(data):
@@ -32,7 +27,7 @@ class Shape:
     def _calculate_centre(self):
         raise NotImplementedError("Subclasses must implement this method")
 
-    def create_masks(self, img_size, filled_val, outline_val, outline_thickness):
+    def draw(self, canvas, colour, thickness=cv2.FILLED):
         raise NotImplementedError("Subclasses must implement this method")
 
     def adjust(self, x_offset, y_offset):
@@ -41,18 +36,13 @@ class Shape:
     def get_closest_point(self, point):
         raise NotImplementedError("Subclasses must implement this method")
 
-    def change_colour(self, fill_colour, outline_colour):
-        if (self.filled_mask is None) or (self.outline_mask is None):
-            raise ValueError("Cannot colour masks when they are empty. Please run 'create_masks()' first.")
-        self.filled_mask = np.where(self.filled_mask == self.fill_colour, fill_colour, self.filled_mask)
-        self.outline_mask = np.where(self.outline_mask == self.outline_colour, outline_colour, self.outline_mask)
-        self.fill_colour = fill_colour
-        self.outline_colour = outline_colour
-
-    def create_merged_mask(self):
-        if (self.filled_mask is None) or (self.outline_mask is None):
-            raise ValueError("Cannot merge masks when masks are empty. Please run 'create_masks()' first.")
-        self.merged_mask = np.where(self.outline_mask == self.outline_colour, self.outline_mask, self.filled_mask)
+    def _get_boundary_point_towards_centre(self, point, corners):
+        # find where the line from the point to the centre crosses the boundary
+        crossing = intersect_segments_with_polygon(point, self.centre, corners)[0]
+        # if it doesn't cross, e.g. the point is inside the shape, use the closest point on the boundary
+        if np.isnan(crossing).any():
+            crossing = get_closest_points_on_polygon(point, corners)[0][0]
+        return int(round(crossing[0])), int(round(crossing[1]))
 
 
 class Rectangle(Shape):
@@ -67,22 +57,8 @@ class Rectangle(Shape):
         y_centre = (self.start_point[1] + self.end_point[1]) / 2
         return (x_centre, y_centre)
 
-    def create_masks(self, img_size, fill_colour=[1, 1, 1], outline_colour=[2, 2, 2], outline_thickness=1):
-        # warn about merge issue
-        if fill_colour == outline_colour:
-            print("WARNING: The shape filling colour and outline colour are the same. May cause issues when merging.")
-        # filled mask
-        filled_canvas = np.zeros(img_size)
-        cv2.rectangle(filled_canvas, self.start_point, self.end_point, color=fill_colour, thickness=cv2.FILLED)
-        self.filled_mask = filled_canvas
-        self.fill_colour = fill_colour
-        # outline mask
-        outline_canvas = np.zeros(img_size)
-        cv2.rectangle(
-            outline_canvas, self.start_point, self.end_point, color=outline_colour, thickness=outline_thickness,
-        )
-        self.outline_mask = outline_canvas
-        self.outline_colour = outline_colour
+    def draw(self, canvas, colour, thickness=cv2.FILLED):
+        cv2.rectangle(canvas, self.start_point, self.end_point, color=colour, thickness=thickness)
 
     def adjust(self, x_offset, y_offset):
         """Returns a new rectangle with points adjusted by an x and y offset."""
@@ -94,8 +70,7 @@ class Rectangle(Shape):
         start_x_end_y = (self.start_point[0], self.end_point[1])
         end_x_start_y = (self.end_point[0], self.start_point[1])
         corners = [self.start_point, start_x_end_y, self.end_point, end_x_start_y]
-        boundary_points = generate_points_on_shape_boundary(corners)
-        return get_closest_point_between_points(boundary_points, point, self.centre)
+        return self._get_boundary_point_towards_centre(point, corners)
 
 
 class Circle(Shape):
@@ -104,20 +79,8 @@ class Circle(Shape):
         self.centre = centre
         self.radius = radius
 
-    def create_masks(self, img_size, fill_colour=[1, 1, 1], outline_colour=[2, 2, 2], outline_thickness=1):
-        # warn about merge issue
-        if fill_colour == outline_colour:
-            print("WARNING: The shape filling colour and outline colour are the same. May cause issues when merging.")
-        # filled mask
-        filled_canvas = np.zeros(img_size)
-        cv2.circle(filled_canvas, self.centre, self.radius, color=fill_colour, thickness=cv2.FILLED)
-        self.filled_mask = filled_canvas
-        self.fill_colour = fill_colour
-        # outline mask
-        outline_canvas = np.zeros(img_size)
-        cv2.circle(outline_canvas, self.centre, self.radius, color=outline_colour, thickness=outline_thickness)
-        self.outline_mask = outline_canvas
-        self.outline_colour = outline_colour
+    def draw(self, canvas, colour, thickness=cv2.FILLED):
+        cv2.circle(canvas, self.centre, self.radius, color=colour, thickness=thickness)
 
     def adjust(self, x_offset, y_offset):
         """Returns a new circle with its centre adjusted by an x and y offset."""
@@ -138,23 +101,11 @@ class Polygon(Shape):
     def _calculate_centre(self):
         return tuple(np.mean(self.points, axis=0).astype(int))
 
-    def create_masks(self, img_size, fill_colour=[1, 1, 1], outline_colour=[2, 2, 2], outline_thickness=1):
-        # warn about merge issue
-        if fill_colour == outline_colour:
-            print("WARNING: The shape filling colour and outline colour are the same. May cause issues when merging.")
-        # filled mask
-        filled_canvas = np.zeros(img_size)
-        cv2.fillPoly(filled_canvas, pts=np.int32([self.points]), color=fill_colour)
-        self.filled_mask = filled_canvas
-        self.fill_colour = fill_colour
-        # outline mask
-        outline_canvas = np.zeros(img_size)
-        cv2.polylines(
-            outline_canvas, pts=np.int32([self.points]), isClosed=True,
-            color=outline_colour, thickness=outline_thickness,
-        )
-        self.outline_mask = outline_canvas
-        self.outline_colour = outline_colour
+    def draw(self, canvas, colour, thickness=cv2.FILLED):
+        if thickness == cv2.FILLED:
+            cv2.fillPoly(canvas, pts=np.int32([self.points]), color=colour)
+        else:
+            cv2.polylines(canvas, pts=np.int32([self.points]), isClosed=True, color=colour, thickness=thickness)
 
     def adjust(self, x_offset, y_offset):
         """Returns a new polygon with points adjusted by an x and y offset."""
@@ -162,5 +113,4 @@ class Polygon(Shape):
         return Polygon(adjusted_points)
 
     def get_closest_point(self, point):
-        all_boundary_points = generate_points_on_shape_boundary(self.points)
-        return get_closest_point_between_points(all_boundary_points, point, self.centre)
+        return self._get_boundary_point_towards_centre(point, self.points)
@@ -3,6 +3,7 @@ import argparse
 import json
 import os
 import sys
+from functools import partial
 
 import cv2
 import pandas as pd
@@ -10,9 +11,10 @@ import yaml
 # import helper classes
 from data_models.image import Image
 from draw_areas import main as drawing_program
+from input_output.frame_sinks import frame_sink_types
 # import utilities
 from utils.file_utils import add_extension, is_file_with_valid_extension
-from utils.input_utils import exit_if_false, exit_if_try_fails
+from utils.input_utils import exit_if_false, exit_if_try_fails, time_to_seconds
 
 # read the default configuration variables
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -20,12 +22,19 @@ with open(os.path.join(root_dir, "configs", "default_configs.yaml"), "r") as def
     default_configs = yaml.load(defaults_file, Loader=yaml.FullLoader)
 default_drawing_output_file = default_configs["drawing"]["output_file_path"]
 default_video_output_file = default_configs["heatmap"]["output_file_path"]
+default_num_workers = default_configs["heatmap"]["workers"]
+default_num_segments = default_configs["heatmap"]["segments"]
+default_frame_sink = default_configs["heatmap"]["frame_sink"]
+default_checkpoint_frames = default_configs["heatmap"]["checkpoint_frames"]
+batch_configs = default_configs["batch"]
 
 
 class HeatmapInputHandler:
 
-    def __init__(self):
-        if len(sys.argv) > 1:
+    def __init__(self, job=None):
+        if job is not None:
+            self._get_variables_from_job(job)
+        elif len(sys.argv) > 1:
             self._get_variables_from_command_line()
         else:
             self._get_variables_from_user()
@@ -75,8 +84,8 @@ class HeatmapInputHandler:
             criteria=universal_criteria,
         )
 
-        # check the files are readable
-        func = {"csv": pd.read_csv, "mp4": cv2.VideoCapture}[file_ext]
+        # check the files are readable, only reading the start of each csv
+        func = {"csv": partial(pd.read_csv, nrows=1), "mp4": cv2.VideoCapture}[file_ext]
         for fpath in file_paths:
             exit_if_try_fails(
                 func,
@@ -122,13 +131,20 @@ class HeatmapInputHandler:
         return Image.from_path(image_path)
 
     @staticmethod
-    def _process_output_file_name(file_name):
+    def _process_output_file_name(file_name, frame_sink="video"):
 
         universal_criteria = "the name for the file the created video will be saved to is valid."
         # check it's not empty
         exit_if_false(file_name, error="You did not enter a valid file name.", criteria=universal_criteria)
 
-        return add_extension(file_name, "mp4")
+        # raw frames go to the exact path given, which can be '-' for stdout or a named pipe
+        if frame_sink in ["raw", "null"] or (frame_sink == "y4m" and file_name == "-"):
+            return file_name
+        if frame_sink == "images":
+            if os.path.splitext(file_name)[1].lower() in [".png", ".jpg", ".jpeg"]:
+                return file_name
+            return add_extension(file_name, "png")
+        return add_extension(file_name, "mp4" if frame_sink == "video" else frame_sink)
 
     @staticmethod
     def _get_heatmap_area_details(file_path):
@@ -232,6 +248,48 @@ class HeatmapInputHandler:
 
         return dictionary_of_events
 
+    @staticmethod
+    def _process_num_workers(num_workers):
+
+        universal_criteria = "the number of workers is 0 or a positive whole number."
+        # check it's not negative
+        exit_if_false(
+            num_workers >= 0,
+            error="You entered a negative number of workers.",
+            criteria=universal_criteria,
+        )
+
+        # use every CPU core if 0 is given
+        return num_workers or os.cpu_count()
+
+    @staticmethod
+    def _process_num_segments(num_segments):
+
+        universal_criteria = "the number of segments is a positive whole number."
+        # check it's positive
+        exit_if_false(
+            num_segments >= 1,
+            error="You entered less than one segment.",
+            criteria=universal_criteria,
+        )
+
+        return num_segments
+
+    @staticmethod
+    def _process_time(time_text, name):
+
+        universal_criteria = f"the {name} time is a whole number of seconds or a time in the format 'HH:MM:SS'."
+        # check it's a time
+        exit_if_try_fails(
+            time_to_seconds,
+            args=[time_text],
+            exception=ValueError,
+            error=f"The {name} time '{time_text}' is not a time.",
+            criteria=universal_criteria,
+        )
+
+        return time_to_seconds(time_text)
+
     def _get_variables_from_command_line(self):
         """
         Function Goal: This function is used to read all the variables in from the command line arguments
@@ -299,13 +357,67 @@ class HeatmapInputHandler:
             required=False,
             help="The path of the folder containing the video footage which accompanies the CSV data.",
         )
+        # number of workers
+        parser.add_argument(
+            '-w',
+            '--workers',
+            dest="num_workers",
+            default=default_num_workers,
+            nargs="?",
+            type=int,
+            required=False,
+            help="The number of processes to render frames with at once. Use 0 for one per CPU core.",
+        )
+        # number of segments
+        parser.add_argument(
+            '-s',
+            '--segments',
+            dest="num_segments",
+            default=default_num_segments,
+            nargs="?",
+            type=int,
+            required=False,
+            help="The number of segments to split the timeline into. Each is rendered to its own video and then joined.",
+        )
+        # frame sink
+        parser.add_argument(
+            '-fs',
+            dest="frame_sink",
+            default=default_frame_sink,
+            nargs="?",
+            type=str,
+            choices=frame_sink_types,
+            required=False,
+            help="Where to write the frames - an MP4 video, raw BGR frames to a file, a pipe or '-' for stdout, "
+                 "a Y4M stream, numbered image files or nowhere.",
+        )
+        # time window
+        parser.add_argument(
+            '--start',
+            dest="start_time",
+            default=None,
+            type=str,
+            required=False,
+            help="The time in the data to start the video at, in seconds or as HH:MM:SS. The default is the start of "
+                 "the data.",
+        )
+        parser.add_argument(
+            '--end',
+            dest="end_time",
+            default=None,
+            type=str,
+            required=False,
+            help="The time in the data to end the video before, in seconds or as HH:MM:SS. The default is the end of "
+                 "the data.",
+        )
 
         args = parser.parse_args()
 
         # process data
         self.background_image = self._process_background_image(args.background_image_path)
         self.csv_file_paths = self._get_file_paths(args.csv_folder_path, "csv")
-        self.video_output_file_path = self._process_output_file_name(args.video_output_file_path)
+        self.frame_sink = args.frame_sink
+        self.video_output_file_path = self._process_output_file_name(args.video_output_file_path, self.frame_sink)
         if args.area_details_file_path == "draw":
             self.area_details = drawing_program(self.background_image, default_drawing_output_file)
             print(
@@ -314,10 +426,63 @@ class HeatmapInputHandler:
             )
         else:
             self.area_details = self._get_heatmap_area_details(args.area_details_file_path)
+        self.event_details = {}
         if args.events_file_path != "none":
             self.event_details = self._get_event_details(args.events_file_path)
+        self.video_file_paths = []
         if args.video_folder_path != "none":
             self.video_file_paths = self._get_file_paths(args.video_folder_path, "mp4")
+        self.num_workers = self._process_num_workers(args.num_workers)
+        self.num_segments = self._process_num_segments(args.num_segments)
+        self.start_time = None if args.start_time is None else self._process_time(args.start_time, "start")
+        self.end_time = None if args.end_time is None else self._process_time(args.end_time, "end")
+
+    def _get_variables_from_job(self, job):
+        """
+        Function Goal : read the variables from a job of a batch, using the files of the job's floor for any it doesn't
+                        give and rendering it with one worker so the batch can render a job on each CPU core
+
+        job : dictionary - the job's 'floor', 'csv_folder', 'output' and optionally 'video_folder', 'start', 'end',
+                           'background_image', 'area_details', 'events_file', 'workers' and 'segments'
+        """
+        floor = job.get("floor")
+
+        def _get_floor_path(key, config_key):
+            if key in job:
+                return job[key]
+            return None if floor is None else batch_configs[config_key].format(floor=floor)
+
+        # process data
+        self.background_image = self._process_background_image(_get_floor_path("background_image", "floor_plan"))
+        self.csv_file_paths = self._get_file_paths(job.get("csv_folder"), "csv")
+        if floor is not None:
+            # only use the floor's csvs when the csvs of every floor are kept in the same folder
+            prefix = batch_configs["csv_prefix"].format(floor=floor)
+            self.csv_file_paths = [path for path in self.csv_file_paths if os.path.basename(path).startswith(prefix)]
+            exit_if_false(
+                self.csv_file_paths,
+                error=f"The csv folder of the floor '{floor}' doesn't contain any csvs starting with '{prefix}'.",
+                criteria="the csvs of each floor in a batch start with the floor's name.",
+            )
+        self.frame_sink = job.get("frame_sink", "video")
+        exit_if_false(
+            self.frame_sink in frame_sink_types and job.get("output") != "-",
+            error="The jobs of a batch can't all write their frames to stdout.",
+            criteria=f"each job writes to its own file with one of the frame sinks {frame_sink_types}.",
+        )
+        self.video_output_file_path = self._process_output_file_name(job.get("output"), self.frame_sink)
+        self.area_details = self._get_heatmap_area_details(_get_floor_path("area_details", "area_outlines"))
+        self.event_details = {}
+        events_file_path = _get_floor_path("events_file", "event_details")
+        if ("events_file" in job) or (events_file_path and os.path.exists(events_file_path)):
+            self.event_details = self._get_event_details(events_file_path)
+        self.video_file_paths = []
+        if job.get("video_folder"):
+            self.video_file_paths = self._get_file_paths(job["video_folder"], "mp4")
+        self.num_workers = self._process_num_workers(job.get("workers", 1))
+        self.num_segments = self._process_num_segments(job.get("segments", 1))
+        self.start_time = None if job.get("start") is None else self._process_time(str(job["start"]), "start")
+        self.end_time = None if job.get("end") is None else self._process_time(str(job["end"]), "end")
 
     def _get_variables_from_user(self):
 
@@ -331,6 +496,7 @@ class HeatmapInputHandler:
         self.csv_file_paths = self._get_file_paths(supplied_csv_folder_path, "csv")
 
         # video output file name
+        self.frame_sink = default_frame_sink
         video_output_file_path = input(
             "Please enter the path to the file where the heatmap video will be output to "
             "(Press 'Enter' for default): "
@@ -341,7 +507,7 @@ class HeatmapInputHandler:
                 "\nThe final heatmap video will be output to the default file - '{}'.".format(default_video_output_file)
             )
         else:
-            self.video_output_file_path = self._process_output_file_name(video_output_file_path)
+            self.video_output_file_path = self._process_output_file_name(video_output_file_path, self.frame_sink)
 
         # area details
         supplied_area_details_file_path = input(
@@ -362,6 +528,7 @@ class HeatmapInputHandler:
             "Please enter the path to the file containing details of events which happen during the video "
             "(Press 'Enter' to skip): "
         )
+        self.event_details = {}
         if supplied_events_file_path != "":
             self.event_details = self._get_event_details(supplied_events_file_path)
 
@@ -370,9 +537,18 @@ class HeatmapInputHandler:
             "Please enter the path of the folder containing the video footage which accompanies the CSV data "
             "(Press 'Enter' to skip): "
         )
+        self.video_file_paths = []
         if supplied_videos_folder_path != "":
             self.video_file_paths = self._get_file_paths(supplied_videos_folder_path, "mp4")
 
+        # render with the default number of workers and segments
+        self.num_workers = self._process_num_workers(default_num_workers)
+        self.num_segments = self._process_num_segments(default_num_segments)
+
+        # render all of the data
+        self.start_time = None
+        self.end_time = None
+
         # Let the user know the inputs have all been received
         print("\nThanks for the inputs! Making the video now, please wait!")
 
@@ -383,9 +559,27 @@ class HeatmapInputHandler:
             error="The number of areas you drew and the number of csvs you supplied do not match.",
             criteria="to draw the same amount of areas on the image as csvs are in the supplied folder.",
         )
-        # check number of videos == number of CSVs
+        # check number of videos == number of CSVs, if any videos were given
         exit_if_false(
-            len(self.video_file_paths) == len(self.csv_file_paths),
+            not self.video_file_paths or len(self.video_file_paths) == len(self.csv_file_paths),
             error="The number of videos in the folder supplied does not match the number of csvs supplied.",
             criteria="the number of videos in the supplied folder is the same as the number of csvs in the supplied folder.",
         )
+        # check the segments are joined into a video
+        exit_if_false(
+            self.num_segments == 1 or self.frame_sink == "video",
+            error=f"The timeline can't be split into segments when writing to the '{self.frame_sink}' frame sink.",
+            criteria="to only use more than one segment when writing to a video.",
+        )
+        # check checkpoints are joined into a video
+        exit_if_false(
+            not default_checkpoint_frames or self.frame_sink == "video",
+            error=f"Checkpoints can't be written when writing to the '{self.frame_sink}' frame sink.",
+            criteria="to set 'checkpoint_frames' to 0 in the configs when not writing to a video.",
+        )
+        # check the time window isn't empty
+        exit_if_false(
+            self.start_time is None or self.end_time is None or self.start_time < self.end_time,
+            error="The end time is not after the start time.",
+            criteria="the end time is after the start time.",
+        )
@@ -0,0 +1,397 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+NANOSECONDS_PER_SECOND = 10 ** 9
+
+
+class RunningMean:
+    """
+    The means of the numbers added to it, ignoring NaN values, added up with Kahan summation as pandas does so the means
+    are the same as those pandas finds.
+    """
+
+    def __init__(self, shape):
+        self.sums = np.zeros(shape)
+        self.compensations = np.zeros(shape)
+        self.counts = np.zeros(shape, dtype=int)
+
+    def add(self, values, positions=slice(None)):
+        sums, compensations = self.sums[positions], self.compensations[positions]
+        is_valid = ~np.isnan(values)
+        y = np.where(is_valid, values - compensations, 0.0)
+        t = sums + y
+        # an infinite value makes the compensation NaN, which pandas resets so the sum stays infinite
+        with np.errstate(invalid="ignore"):
+            new_compensations = (t - sums) - y
+        new_compensations[np.isnan(new_compensations)] = 0.0
+        self.compensations[positions] = np.where(is_valid, new_compensations, compensations)
+        self.sums[positions] = np.where(is_valid, t, sums)
+        self.counts[positions] += is_valid
+
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.sums / self.counts, np.nan)
+
+
+def group_means(keys, values):
+    """
+    Function Goal : average the values of each run of equal keys, ignoring NaN values and adding them up in the order
+                    they're in, as grouping by the keys with pandas does
+
+    keys : 1D numpy array - the sorted keys
+    values : numpy array - the values at each key, one row for each key
+
+    return : tuple (1D numpy array, numpy array) - each distinct key and the mean of its values
+    """
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=int)
+    counts = np.diff(np.r_[starts, len(keys)])
+    running_mean = RunningMean((len(starts),) + values.shape[1:])
+    # add the first value of every group, then the second value of the groups with two or more and so on, the biggest
+    # groups first so the groups with a value left are always the first ones
+    by_size = np.argsort(-counts, kind="stable")
+    sorted_counts = counts[by_size]
+    for i in range(sorted_counts[0] if len(sorted_counts) else 0):
+        groups = by_size[:np.searchsorted(-sorted_counts, -i)]
+        running_mean.add(values[starts[groups] + i], groups)
+    return keys[starts], running_mean.mean()
+
+
+def read_sorted_chunks(csv_path, columns, chunk_size=100000, reorder_rows=1000, max_rows=None):
+    """
+    Function Goal : read a csv a chunk at a time with its rows in time order, holding back the last rows read so rows
+                    that are a little out of order are put back in order
+                    rows at the same time stay in the order they are in the csv
+
+    csv_path : string - the path to the csv
+    columns : list of strings - the names of the csv's minute and sensor value columns
+    chunk_size : integer - the number of lines to read at a time
+    reorder_rows : integer - the number of rows held back, which is how far out of order a row can be
+    max_rows : integer - the number of lines to read, None to read them all
+
+    return : generator of tuples [(1D numpy array of floats, 1D numpy array of floats), ...] - the second and value of
+                                                                                               each row in a chunk
+    """
+    held_seconds, held_values = np.empty(0), np.empty(0)
+    last_second = -np.inf
+    for chunk in pd.read_csv(csv_path, names=columns, chunksize=chunk_size, nrows=max_rows):
+        seconds = chunk[columns[0]].to_numpy(dtype=float) * 60
+        values = chunk[columns[1]].to_numpy(dtype=float)
+        # rows without a time are dropped, as grouping by the time drops them
+        has_time = ~np.isnan(seconds)
+        seconds = np.concatenate([held_seconds, seconds[has_time]])
+        values = np.concatenate([held_values, values[has_time]])
+        order = np.argsort(seconds, kind="stable")
+        seconds, values = seconds[order], values[order]
+        num_ready = max(len(seconds) - reorder_rows, 0)
+        held_seconds, held_values = seconds[num_ready:], values[num_ready:]
+        if num_ready:
+            last_second = _check_order(csv_path, reorder_rows, last_second, seconds[:num_ready])
+            yield seconds[:num_ready], values[:num_ready]
+    if len(held_seconds):
+        _check_order(csv_path, reorder_rows, last_second, held_seconds)
+        yield held_seconds, held_values
+
+
+def _check_order(csv_path, reorder_rows, last_second, seconds):
+    # a row earlier than a row already given was too far out of order to be put back in order
+    if seconds[0] < last_second:
+        raise ValueError(
+            f"The csv '{csv_path}' has a row more than {reorder_rows} rows out of time order at minute "
+            f"{seconds[0] / 60:g}, so it can't be streamed. Set 'stream_csvs' to false to read it whole instead."
+        )
+    return seconds[-1]
+
+
+def can_stream_csv(csv_path, columns, chunk_size=100000, reorder_rows=1000, check_rows=200000):
+    """
+    Function Goal : check the first rows of a csv are close enough to time order to be streamed
+                    only the first rows are read so the check doesn't hold up the first frame, which means a csv that's
+                    only out of order further on still stops part way through when it's streamed
+
+    csv_path : string - the path to the csv
+    columns : list of strings - the names of the csv's minute and sensor value columns
+    chunk_size : integer - the number of lines to read at a time
+    reorder_rows : integer - how far out of order a row can be
+    check_rows : integer - the number of lines to check
+
+    return : boolean - whether the first rows of the csv can be streamed
+    """
+    try:
+        for _ in read_sorted_chunks(csv_path, columns, chunk_size, reorder_rows, max_rows=check_rows):
+            pass
+    except ValueError:
+        return False
+    return True
+
+
+def read_area_rows(csv_path, columns, chunk_size=100000, reorder_rows=1000):
+    """
+    Function Goal : read a csv a chunk at a time, averaging the values of rows at the same second
+                    this gives the same rows as 'read_csv_into_dataframe()' without holding the whole csv
+
+    csv_path : string - the path to the csv
+    columns : list of strings - the names of the csv's minute and sensor value columns
+    chunk_size : integer - the number of lines to read at a time
+    reorder_rows : integer - how far out of order a row can be
+
+    return : generator of tuples [(1D numpy array of ints, 1D numpy array of floats), ...] - the time of each row in a
+                                                                                             chunk in nanoseconds and
+                                                                                             its value
+    """
+    carried_seconds, carried_values = np.empty(0), np.empty(0)
+    for seconds, values in read_sorted_chunks(csv_path, columns, chunk_size, reorder_rows):
+        seconds = np.concatenate([carried_seconds, seconds])
+        values = np.concatenate([carried_values, values])
+        # the rows at the last second can carry on into the next chunk, so they're averaged with it
+        num_ready = np.searchsorted(seconds, seconds[-1])
+        carried_seconds, carried_values = seconds[num_ready:], values[num_ready:]
+        if num_ready:
+            yield _average_area_rows(seconds[:num_ready], values[:num_ready])
+    if len(carried_seconds):
+        yield _average_area_rows(carried_seconds, carried_values)
+
+
+def _average_area_rows(seconds, values):
+    seconds, means = group_means(seconds, values)
+    return pd.to_datetime(seconds, unit="s").asi8, means
+
+
+def read_area_window(csv_path, columns, start_time=None, end_time=None, chunk_size=100000, reorder_rows=1000):
+    """
+    Function Goal : read the rows of a csv that the seconds in a time window are made from, a chunk at a time, averaging
+                    the values of rows at the same second as 'read_area_rows()' does
+                    before the window only the last second and the last value before it are kept, as they're all
+                    that's filled forward into the window, and reading stops at the first value after the window, as
+                    it's all that's needed to know whether the end of the window is filled
+
+    csv_path : string - the path to the csv
+    columns : list of strings - the names of the csv's minute and sensor value columns
+    start_time : integer - the first second in the window, None to start at the first row
+    end_time : integer - the second the window ends before, None to end after the last row
+    chunk_size : integer - the number of lines to read at a time
+    reorder_rows : integer - how far out of order a row can be
+
+    return : tuple (1D numpy array of ints, 1D numpy array of floats) - the time of each row kept in nanoseconds and its
+                                                                        value
+    """
+    # a row's second is rounded, which can round it up into the window, so the second before the window is kept whole
+    first_time = -np.inf if start_time is None else (start_time - 1) * NANOSECONDS_PER_SECOND
+    end_time = np.inf if end_time is None else end_time * NANOSECONDS_PER_SECOND
+    # the last value before the last second before the window, and the rows of that second
+    last_value_rows = np.empty(0, dtype=np.int64), np.empty(0)
+    before_times, before_values = np.empty(0, dtype=np.int64), np.empty(0)
+    kept_rows = []
+    for times, values in read_area_rows(csv_path, columns, chunk_size, reorder_rows):
+        num_before = np.searchsorted(times, first_time)
+        if num_before:
+            before_times = np.r_[before_times, times[:num_before]]
+            before_values = np.r_[before_values, values[:num_before]]
+            last_second_time = before_times[-1] // NANOSECONDS_PER_SECOND * NANOSECONDS_PER_SECOND
+            num_earlier = np.searchsorted(before_times, last_second_time)
+            value_rows = np.flatnonzero(~np.isnan(before_values[:num_earlier]))
+            if len(value_rows):
+                last_value_rows = before_times[value_rows[-1:]], before_values[value_rows[-1:]]
+            before_times, before_values = before_times[num_earlier:], before_values[num_earlier:]
+            times, values = times[num_before:], values[num_before:]
+        num_inside = np.searchsorted(times, end_time)
+        value_rows_after = np.flatnonzero(~np.isnan(values[num_inside:]))
+        if len(value_rows_after):
+            num_kept = num_inside + value_rows_after[0] + 1
+            kept_rows.append((times[:num_kept], values[:num_kept]))
+            break
+        kept_rows.append((times, values))
+    kept_rows = [last_value_rows, (before_times, before_values)] + kept_rows
+    return np.concatenate([times for times, _ in kept_rows]), np.concatenate([values for _, values in kept_rows])
+
+
+class AreaChunks:
+    """
+    The rows of one area's csv, taken up to a time at a time, which can be looked ahead in to find whether the area has
+    a value later on.
+    Up to two chunks of rows are held at a time, past that a second reader of the csv looks further ahead for the next
+    value, so a long run of rows without a value isn't held.
+    """
+
+    def __init__(self, open_chunks):
+        self.chunks = open_chunks()
+        self.times, self.values = np.empty(0, dtype=np.int64), np.empty(0)
+        # the number of rows in the last chunk read, when no more rows than this are held they're all from it
+        self.chunk_rows = 0
+        # makes another reader of the same rows, only opened when the rows held have no value to look ahead to
+        self.open_scout = open_chunks
+        self.scout = None
+        self.scout_times, self.scout_values = np.empty(0, dtype=np.int64), np.empty(0)
+
+    def last_time(self):
+        """
+        Function Goal : find the time of the last row held, reading the next chunk when every row held has been taken
+
+        return : integer - the time in nanoseconds, None when every row has been taken
+        """
+        if not len(self.times):
+            self.times, self.values = next(self.chunks, (self.times, self.values))
+            self.chunk_rows = len(self.times)
+        return self.times[-1] if len(self.times) else None
+
+    def take(self, time):
+        """
+        Function Goal : take the rows held up to a time
+
+        time : integer - the time in nanoseconds of the last row to take
+
+        return : tuple (1D numpy array of ints, 1D numpy array of floats) - the time of each row taken and its value
+        """
+        num_rows = np.searchsorted(self.times, time, side="right")
+        rows = self.times[:num_rows], self.values[:num_rows]
+        self.times, self.values = self.times[num_rows:], self.values[num_rows:]
+        return rows
+
+    def has_value_after(self, time):
+        """
+        Function Goal : find whether a row after the ones taken has a value, reading ahead past rows without a value
+
+        time : integer - the time in nanoseconds of the last row taken
+
+        return : boolean - whether there's a later value
+        """
+        if not np.isnan(self.values).all():
+            return True
+        # the next chunk is read onto the rows held before opening the second reader
+        if len(self.times) <= self.chunk_rows:
+            next_chunk = next(self.chunks, None)
+            if next_chunk is None:
+                return False
+            next_times, next_values = next_chunk
+            self.times, self.values = np.r_[self.times, next_times], np.r_[self.values, next_values]
+            self.chunk_rows = len(next_times)
+            if not np.isnan(next_values).all():
+                return True
+        # the times asked about only go up, so the second reader only ever reads forward
+        if self.scout is None:
+            self.scout = self.open_scout()
+        while np.isnan(self.scout_values[self.scout_times > time]).all():
+            next_chunk = next(self.scout, None)
+            if next_chunk is None:
+                return False
+            self.scout_times, self.scout_values = next_chunk
+        return True
+
+
+def merge_area_chunks(areas):
+    """
+    Function Goal : merge the rows of the areas in time order, filling each area's missing values with its last value
+                    when it has a value both before and after, as 'ffill(limit_area="inside")' does
+                    the rows are merged up to the end of the chunk that ends first, so only a chunk or two of each
+                    area is held
+
+    areas : list of AreaChunks objects - the rows of each area
+
+    return : generator of tuples [(1D numpy array of ints, 2D numpy array of floats), ...] - the time of each row in a
+                                                                                             chunk in nanoseconds and
+                                                                                             the value of each area then
+    """
+    last_values = np.full(len(areas), np.nan)
+    while True:
+        last_times = [time for time in (area.last_time() for area in areas) if time is not None]
+        if not last_times:
+            return
+        # every row up to the end of the chunk that ends first has been read, whichever csv it's in
+        time = min(last_times)
+        area_rows = [area.take(time) for area in areas]
+        # each area's times are sorted already, so a stable sort just merges them
+        times = np.sort(np.concatenate([area_times for area_times, _ in area_rows]), kind="stable")
+        times = times[np.r_[True, times[1:] != times[:-1]]]
+        values = np.full((len(times), len(areas)), np.nan)
+        for i, (area, (area_times, area_values)) in enumerate(zip(areas, area_rows)):
+            values[np.searchsorted(times, area_times), i] = area_values
+            has_value = ~np.isnan(values[:, i])
+            # the last value at or before each row, from this chunk or the ones before it
+            last_value_rows = np.maximum.accumulate(np.where(has_value, np.arange(len(times)), -1))
+            filled_values = np.where(last_value_rows >= 0, values[last_value_rows, i], last_values[i])
+            # whether there's a value at or after each row, looking past this chunk only when it's needed
+            value_ahead = np.logical_or.accumulate(has_value[::-1])[::-1]
+            needs_value = ~has_value & ~np.isnan(filled_values)
+            if (needs_value & ~value_ahead).any() and area.has_value_after(time):
+                value_ahead[:] = True
+            values[:, i] = np.where(needs_value & value_ahead, filled_values, values[:, i])
+            if has_value.any():
+                last_values[i] = filled_values[-1]
+        yield times, values
+
+
+def resample_chunks(chunks, num_areas):
+    """
+    Function Goal : average the rows in each second and fill the seconds without a row from the second before, when
+                    there's a value both before and after, as 'resample("1s").mean().ffill(limit_area="inside")' does
+                    only a chunk of rows is held at a time, however long the gaps between the rows are
+
+    chunks : iterable of tuples [(1D numpy array of ints, 2D numpy array of floats), ...] - the rows in time order, from
+                                                                                            'merge_area_chunks()'
+    num_areas : integer - the number of areas
+
+    return : generator of tuples [(1D numpy array of ints, 2D numpy array of floats), ...] - each second of a chunk and
+                                                                                             the value of each area then
+    """
+    # the last second with rows is held until the next one, which decides how the empty seconds between are filled
+    held_second, held_values = None, None
+    carried_seconds, carried_values = np.empty(0, dtype=np.int64), np.empty((0, num_areas))
+    for times, values in chunks:
+        seconds = np.concatenate([carried_seconds, times // NANOSECONDS_PER_SECOND])
+        values = np.concatenate([carried_values, values])
+        # the rows at the last second can carry on into the next chunk, so they're averaged with it
+        num_ready = np.searchsorted(seconds, seconds[-1])
+        carried_seconds, carried_values = seconds[num_ready:], values[num_ready:]
+        if num_ready:
+            held_second, held_values = yield from _fill_seconds(
+                held_second, held_values, *group_means(seconds[:num_ready], values[:num_ready])
+            )
+    if len(carried_seconds):
+        held_second, held_values = yield from _fill_seconds(
+            held_second, held_values, *group_means(carried_seconds, carried_values)
+        )
+    if held_second is not None:
+        yield np.array([held_second]), held_values[np.newaxis]
+
+
+def _fill_seconds(held_second, held_values, seconds, values):
+    # give the held second and the seconds after it up to the last second, filling the empty seconds from the second
+    # before them where the next second has a value, then hold the last second
+    if held_second is not None:
+        seconds = np.r_[held_second, seconds]
+        values = np.vstack([held_values, values])
+    gap_values = np.where(np.isnan(values[1:]), np.nan, values[:-1])
+    filled_values = np.repeat(gap_values, np.diff(seconds), axis=0)
+    filled_values[seconds[:-1] - seconds[0]] = values[:-1]
+    if len(filled_values):
+        yield np.arange(seconds[0], seconds[-1]), filled_values
+    return seconds[-1], values[-1]
+
+
+def stream_csv_data(csv_file_paths, columns, chunk_size=100000, reorder_rows=1000):
+    """
+    Function Goal : read the csvs a chunk at a time into a row for each second, the same rows as joining them with
+                    'process_csv_dataframes()', so the memory used doesn't grow with the length of the csvs
+                    the csvs must be sorted by time, apart from rows up to 'reorder_rows' rows out of place
+
+    csv_file_paths : list of strings - the paths to the csvs
+    columns : list of strings - the names of the csvs' minute and sensor value columns
+    chunk_size : integer - the number of lines to read from each csv at a time
+    reorder_rows : integer - how far out of order a row can be
+
+    return : generator of tuples [(int, 1D numpy array of floats), ...] - the second of each row and the value of each
+                                                                           area then
+    """
+    open_area_chunks = [partial(read_area_rows, path, columns, chunk_size, reorder_rows) for path in csv_file_paths]
+    if len(open_area_chunks) == 1:
+        # one csv is used as it is, as 'process_csv_dataframes()' does
+        for times, values in open_area_chunks[0]():
+            # the second of each row, rounded as 'Timestamp.timestamp()' rounds it
+            seconds = np.trunc(np.round(times / 1e9, 6)).astype(int)
+            yield from zip(seconds.tolist(), values[:, np.newaxis])
+        return
+
+    merged_chunks = merge_area_chunks([AreaChunks(open_chunks) for open_chunks in open_area_chunks])
+    for seconds, values in resample_chunks(merged_chunks, len(open_area_chunks)):
+        yield from zip(seconds.tolist(), values)
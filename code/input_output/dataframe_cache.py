@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# change this when the stored DataFrames change, so old ones are made again
+cache_version = 1
+
+
+def get_cache_key(name, file_paths, configs):
+    """
+    Function Goal : make the key a DataFrame made from some files is kept under in the cache
+                    the key changes when any of the files or configs change, so the DataFrame is made again
+
+    name : string - what the DataFrame is, to keep different DataFrames made from the same files apart
+    file_paths : list of strings - the paths to the files the DataFrame is made from
+    configs : dictionary - the configs the DataFrame is made with, these must be JSON serialisable
+
+    return : string - the key
+    """
+    files = []
+    for path in file_paths:
+        stats = os.stat(path)
+        files.append([os.path.realpath(path), stats.st_size, stats.st_mtime_ns])
+    source = json.dumps([cache_version, name, files, configs], sort_keys=True)
+    return f"{name}_{hashlib.sha1(source.encode()).hexdigest()[:16]}"
+
+
+def save_dataframe(df, folder):
+    """
+    Function Goal : store a DataFrame of floats with a datetime index as '.npy' arrays and a small JSON manifest
+
+    df : DataFrame - the DataFrame to store
+    folder : string - the folder to store the DataFrame in, which mustn't exist yet
+
+    return : None
+    """
+    os.makedirs(folder)
+    np.save(os.path.join(folder, "index.npy"), df.index.asi8)
+    np.save(os.path.join(folder, "values.npy"), df.to_numpy(dtype=float))
+    manifest = {
+        "columns": [str(column) for column in df.columns],
+        "index_name": df.index.name,
+        "freq": df.index.freqstr,
+        "shape": list(df.shape),
+    }
+    with open(os.path.join(folder, "manifest.json"), "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+
+def load_dataframe(folder, memory_map=True):
+    """
+    Function Goal : read a DataFrame stored by 'save_dataframe()'
+
+    folder : string - the folder the DataFrame is stored in
+    memory_map : boolean - whether to map the values into memory instead of reading them, so only the rows used are read
+
+    return : DataFrame - the stored DataFrame
+    """
+    with open(os.path.join(folder, "manifest.json"), "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    mmap_mode = "r" if memory_map else None
+    index = np.load(os.path.join(folder, "index.npy"), mmap_mode=mmap_mode)
+    values = np.load(os.path.join(folder, "values.npy"), mmap_mode=mmap_mode)
+    if list(values.shape) != manifest["shape"]:
+        raise ValueError(f"The values stored in '{folder}' don't match their manifest.")
+    index = pd.DatetimeIndex(index.astype("datetime64[ns]"), name=manifest["index_name"], freq=manifest["freq"])
+    return pd.DataFrame(values, index=index, columns=manifest["columns"], copy=False)
+
+
+def get_cached_dataframe(key, cache_folder, create_dataframe):
+    """
+    Function Goal : get a DataFrame from the cache, making it and storing it in the cache the first time it's asked for
+
+    key : string - the key of the DataFrame, from 'get_cache_key()'
+    cache_folder : string - the folder the DataFrames are kept in
+    create_dataframe : function - makes the DataFrame when it isn't in the cache
+
+    return : DataFrame - the DataFrame
+    """
+    folder = os.path.join(cache_folder, key)
+    try:
+        return load_dataframe(folder)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    df = create_dataframe()
+    # write to a temporary folder first, so a DataFrame is never read half written
+    temp_folder = f"{folder}.{os.getpid()}.tmp"
+    try:
+        shutil.rmtree(folder, ignore_errors=True)
+        save_dataframe(df, temp_folder)
+        os.replace(temp_folder, folder)
+    except OSError:
+        # the DataFrame still works for this run if the cache can't be written to
+        pass
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+    return df
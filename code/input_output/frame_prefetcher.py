@@ -0,0 +1,130 @@
+import queue
+import threading
+
+import numpy as np
+# import utilities
+from utils.image_utils import fit_to_size
+
+
+class FrameNumberFeed:
+    """
+    The frame numbers a prefetcher reads, given to it one at a time as they become known, so the prefetcher can start
+    before every frame that will be read is known.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.closed = False
+
+    def put(self, frame_number):
+        # frame numbers given after closing are dropped, so they don't build up once the prefetcher has stopped
+        if not self.closed:
+            self.queue.put(frame_number)
+
+    def close(self):
+        """
+        Function Goal : mark the end of the frame numbers
+
+        return : None
+        """
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+
+    def __iter__(self):
+        frame_number = self.queue.get()
+        while frame_number is not None:
+            yield frame_number
+            frame_number = self.queue.get()
+
+
+class FramePrefetcher:
+    """
+    Reads frames from a video in a background thread before they're asked for, resizing each frame as it's read, and
+    keeps the next few ready in a bounded buffer.
+    OpenCV lets go of the GIL while it decodes and resizes, so the prefetchers of several cameras decode at once.
+    While the prefetcher is running, the video reader must only be used by it.
+    """
+
+    def __init__(self, video_reader, frame_numbers, frame_size, depth):
+        # a list of frame numbers, or a FrameNumberFeed when they're only known as the frames are rendered
+        self.video_reader = video_reader
+        self.frame_numbers = frame_numbers
+        self.frame_size = frame_size
+        self.buffer = queue.Queue(maxsize=depth)
+        self.stop_event = threading.Event()
+        # the frame taken from the buffer that hasn't been asked for yet
+        self.next_frame = None
+        self.thread = threading.Thread(target=self._read_frames, name=f"prefetch {video_reader.file_path}", daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        # wait for room in the buffer, giving up if the prefetcher is closed
+        while not self.stop_event.is_set():
+            try:
+                self.buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_frames(self):
+        try:
+            for frame_number in self.frame_numbers:
+                frame_number = int(frame_number)
+                try:
+                    frame = self.video_reader.get_frame(frame_number)
+                except ValueError:
+                    # a frame that can't be read is shown as a finished camera
+                    frame = np.zeros((1, 1, 3), dtype=np.uint8)
+                if not self._put((frame_number, fit_to_size(frame, self.frame_size))):
+                    return
+        finally:
+            # mark the end of the frames, even if reading them failed, so 'get_frame()' doesn't wait forever
+            self._put(None)
+
+    def get_frame(self, frame_number):
+        """
+        Function Goal : get a frame resized to the frame size, waiting for it to be read if it isn't ready yet
+
+        frame_number : number - the frame to get, frames are fastest when asked for in the order they were given
+
+        return : 3D numpy array of uint8 integers - the resized frame
+        """
+        frame_number = int(frame_number)
+        # skip any frames that weren't asked for
+        while self.thread is not None:
+            if self.next_frame is None:
+                self.next_frame = self.buffer.get()
+                if self.next_frame is None:
+                    break
+            if self.next_frame[0] >= frame_number:
+                break
+            self.next_frame = None
+        if (self.next_frame is not None) and (self.next_frame[0] == frame_number):
+            frame, self.next_frame = self.next_frame[1], None
+            return frame
+
+        # the frame wasn't read ahead, so stop the thread and read the frames as they're asked for from now on
+        self.close()
+        try:
+            frame = self.video_reader.get_frame(frame_number)
+        except ValueError:
+            frame = np.zeros((1, 1, 3), dtype=np.uint8)
+        return fit_to_size(frame, self.frame_size)
+
+    def close(self):
+        """
+        Function Goal : stop reading frames ahead and wait for the thread to finish
+
+        return : None
+        """
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        # a thread waiting for the next frame number is woken up by the end of the frame numbers
+        if isinstance(self.frame_numbers, FrameNumberFeed):
+            self.frame_numbers.close()
+        self.thread.join()
+        self.thread = None
+        self.next_frame = None
@@ -0,0 +1,162 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+import cv2
+
+# the kinds of frame sink that can be chosen, in the order they are listed to the user
+frame_sink_types = ["video", "raw", "y4m", "images", "null"]
+
+
+class FrameSink:
+    """
+    Somewhere the frames of the heatmap video are written to, one frame at a time and in order.
+    Each frame is a 3D numpy array of BGR uint8 values that may be changed once 'write()' returns, so a sink that keeps
+    a frame after 'write()' returns must copy it.
+    """
+
+    def __init__(self, path, frame_rate, frame_size):
+        self.path = path
+        self.frame_rate = frame_rate
+        self.width, self.height = frame_size
+
+    def write(self, frame):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def release(self):
+        pass
+
+
+class VideoSink(FrameSink):
+    """
+    Encodes the frames into a video file with OpenCV.
+    """
+
+    def __init__(self, path, frame_rate, frame_size, fourcc="mp4v"):
+        super().__init__(path, frame_rate, frame_size)
+        self.writer = cv2.VideoWriter(
+            filename=path, fourcc=cv2.VideoWriter_fourcc(*fourcc), fps=frame_rate, frameSize=frame_size, isColor=True,
+        )
+        if not self.writer.isOpened():
+            raise ValueError(f"Unable to open the video file '{path}' for writing with the codec '{fourcc}'.")
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class RawSink(FrameSink):
+    """
+    Writes the bytes of the frames one after another with no header, as packed BGR24.
+    Writing to '-' sends the frames to stdout, and a named pipe can be given as the path, so an encoder can read them
+    as they're made, e.g. 'ffmpeg -f rawvideo -pix_fmt bgr24 -s 1920x1080 -r 30 -i - video.mp4'.
+    """
+
+    def __init__(self, path, frame_rate, frame_size):
+        super().__init__(path, frame_rate, frame_size)
+        # use the stdout the program started with, in case printing was moved off it to keep the frames apart
+        self.file = sys.__stdout__.buffer if path == "-" else open(path, "wb")
+
+    def write(self, frame):
+        self.file.write(memoryview(frame.reshape(-1)))
+
+    def release(self):
+        self.file.flush()
+        if self.file is not sys.__stdout__.buffer:
+            self.file.close()
+
+
+class Y4MSink(RawSink):
+    """
+    Writes the frames as a YUV4MPEG2 stream of 4:2:0 frames, which most encoders and players read with no other options.
+    Like the raw sink, '-' writes the stream to stdout.
+    """
+
+    def __init__(self, path, frame_rate, frame_size):
+        # check the size before the output is opened, so a size that can't be written leaves no file behind
+        width, height = frame_size
+        if (width % 2) or (height % 2):
+            raise ValueError(f"Cannot write 4:2:0 frames with an odd width or height '{width}x{height}'.")
+        super().__init__(path, frame_rate, frame_size)
+        rate = Fraction(str(frame_rate)).limit_denominator(1001)
+        self.file.write(
+            f"YUV4MPEG2 W{self.width} H{self.height} F{rate.numerator}:{rate.denominator} Ip A1:1 C420jpeg\n".encode()
+        )
+
+    def write(self, frame):
+        # OpenCV gives the Y, U and V planes one after the other, as Y4M stores them
+        self.file.write(b"FRAME\n")
+        self.file.write(memoryview(cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420).reshape(-1)))
+
+
+class ImageSequenceSink(FrameSink):
+    """
+    Writes each frame to its own numbered image file in a pool of threads, so encoding the images overlaps.
+    The path is the name of the images with their extension, e.g. 'frames/frame.png' writes 'frames/frame_000000.png',
+    'frames/frame_000001.png', ...
+    """
+
+    def __init__(self, path, frame_rate, frame_size, num_threads=None, max_pending=None):
+        super().__init__(path, frame_rate, frame_size)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        name, extension = os.path.splitext(os.path.basename(path))
+        self.path_template = os.path.join(folder, name + "_{:06}" + extension)
+        self.num_frames = 0
+        num_threads = num_threads or os.cpu_count()
+        self.pool = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="image_sink")
+        # wait for the oldest image when too many are waiting, this bounds the memory used by the copied frames
+        self.max_pending = max_pending or (2 * num_threads)
+        self.pending = deque()
+
+    @staticmethod
+    def _write_image(path, frame):
+        if not cv2.imwrite(path, frame):
+            raise ValueError(f"Unable to write the image file '{path}'.")
+
+    def write(self, frame):
+        while len(self.pending) >= self.max_pending:
+            self.pending.popleft().result()
+        path = self.path_template.format(self.num_frames)
+        self.pending.append(self.pool.submit(self._write_image, path, frame.copy()))
+        self.num_frames += 1
+
+    def release(self):
+        try:
+            while self.pending:
+                self.pending.popleft().result()
+        finally:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class NullSink(FrameSink):
+    """
+    Throws the frames away, to time rendering without the cost of encoding the frames.
+    """
+
+    def write(self, frame):
+        pass
+
+
+def create_frame_sink(sink_type, path, frame_rate, frame_size, fourcc="mp4v"):
+    """
+    Function Goal : create a frame sink of a particular kind
+
+    sink_type : string - one of 'frame_sink_types'
+    path : string - where to write the frames
+    frame_rate : float - the frame rate of the frames
+    frame_size : tuple of integers (int, int) - the width and height of the frames
+    fourcc : string - the code of the codec to encode with when writing a video
+
+    return : FrameSink object
+    """
+    if sink_type == "video":
+        return VideoSink(path, frame_rate, frame_size, fourcc)
+    sink_classes = {"raw": RawSink, "y4m": Y4MSink, "images": ImageSequenceSink, "null": NullSink}
+    if sink_type not in sink_classes:
+        raise ValueError(f"Unknown frame sink '{sink_type}'. Please use one of {frame_sink_types}.")
+    return sink_classes[sink_type](path, frame_rate, frame_size)
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+
+import cv2
+
+
+class RenderCheckpoint:
+    """
+    The segments of a render that have been written, kept in a folder with a small manifest so a render that stopped
+    part way through carries on from the segments it finished.
+    The manifest records a key of everything the frames are made from, and the size and number of frames of each
+    finished segment, so segments are only used again for the same render and when they're whole.
+    """
+
+    manifest_name = "progress.json"
+
+    def __init__(self, folder, key):
+        self.folder = folder
+        self.key = key
+        # the size and number of frames of each finished segment, by its file name
+        self.finished = {}
+
+    @staticmethod
+    def load(folder, key):
+        """
+        Function Goal : open the checkpoint of a render, keeping the finished segments of an earlier try at the same
+                        render and clearing the folder if it was for a different one
+
+        folder : string - the folder the segments and manifest are kept in
+        key : string - the key of everything the frames are made from
+
+        return : RenderCheckpoint object
+        """
+        checkpoint = RenderCheckpoint(folder, key)
+        try:
+            with open(os.path.join(folder, RenderCheckpoint.manifest_name), "r") as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest["key"] == key:
+                checkpoint.finished = manifest["segments"]
+        except (OSError, ValueError, KeyError):
+            pass
+        if not checkpoint.finished:
+            shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder, exist_ok=True)
+        return checkpoint
+
+    def is_finished(self, segment_path, num_frames):
+        """
+        Function Goal : check a segment was finished by an earlier try, and is still the whole segment that was written
+
+        segment_path : string - the path to the segment
+        num_frames : integer - the number of frames the segment has
+
+        return : boolean - whether the segment can be used as it is
+        """
+        details = self.finished.get(os.path.basename(segment_path))
+        if (details is None) or (details["frames"] != num_frames):
+            return False
+        if not os.path.isfile(segment_path) or (os.path.getsize(segment_path) != details["size"]):
+            return False
+        video = cv2.VideoCapture(segment_path)
+        try:
+            return video.isOpened() and int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == num_frames
+        finally:
+            video.release()
+
+    def mark_finished(self, segment_path, num_frames):
+        """
+        Function Goal : record that a segment has been written in full
+
+        segment_path : string - the path to the segment
+        num_frames : integer - the number of frames in the segment
+
+        return : None
+        """
+        self.finished[os.path.basename(segment_path)] = {"frames": num_frames, "size": os.path.getsize(segment_path)}
+        # write to a temporary file first, so a render stopping part way through never leaves half a manifest
+        manifest_path = os.path.join(self.folder, self.manifest_name)
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump({"key": self.key, "segments": self.finished}, manifest_file)
+        os.replace(temp_path, manifest_path)
+
+    def remove(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
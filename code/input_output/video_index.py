@@ -0,0 +1,190 @@
+import json
+import os
+import struct
+from bisect import bisect_right
+
+import cv2
+
+
+def _read_boxes(mp4_file, start, end):
+    # give the type, start and end of the contents of each MP4 box between two positions in the file
+    position = start
+    while position + 8 <= end:
+        mp4_file.seek(position)
+        size, box_type = struct.unpack(">I4s", mp4_file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", mp4_file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, position + size
+        position += size
+
+
+def _find_box(mp4_file, start, end, box_type):
+    # find the first box of a type between two positions in the file
+    return next(((box_start, box_end) for found_type, box_start, box_end in _read_boxes(mp4_file, start, end)
+                 if found_type == box_type), None)
+
+
+def read_mp4_keyframes(video_path):
+    """
+    Function Goal : read the keyframes of an MP4 video's video track from its table of sync samples
+                    the table is written by the encoder, so unlike asking the decoder it doesn't depend on how far
+                    behind the packets it has read the decoder gives its frames
+
+    video_path : string - the path to the video
+
+    return : list of integers or None - the numbers of the keyframes, or None if the video isn't an MP4 with a table
+    """
+    try:
+        with open(video_path, "rb") as mp4_file:
+            mp4_file.seek(0, os.SEEK_END)
+            moov = _find_box(mp4_file, 0, mp4_file.tell(), b"moov")
+            if moov is None:
+                return None
+            for box_type, trak_start, trak_end in _read_boxes(mp4_file, *moov):
+                mdia = _find_box(mp4_file, trak_start, trak_end, b"mdia") if box_type == b"trak" else None
+                hdlr = _find_box(mp4_file, *mdia, b"hdlr") if mdia is not None else None
+                if hdlr is None:
+                    continue
+                mp4_file.seek(hdlr[0] + 8)
+                if mp4_file.read(4) != b"vide":
+                    continue
+                minf = _find_box(mp4_file, *mdia, b"minf")
+                stbl = _find_box(mp4_file, *minf, b"stbl") if minf is not None else None
+                stsz = _find_box(mp4_file, *stbl, b"stsz") if stbl is not None else None
+                if stsz is None:
+                    return None
+                mp4_file.seek(stsz[0] + 8)
+                num_samples = struct.unpack(">I", mp4_file.read(4))[0]
+                # a fragmented video keeps its samples outside this table
+                if num_samples == 0:
+                    return None
+                stss = _find_box(mp4_file, *stbl, b"stss")
+                # with no table of sync samples every sample is a keyframe
+                if stss is None:
+                    return list(range(num_samples))
+                mp4_file.seek(stss[0] + 4)
+                num_keyframes = struct.unpack(">I", mp4_file.read(4))[0]
+                sample_numbers = struct.unpack(f">{num_keyframes}I", mp4_file.read(4 * num_keyframes))
+                return [sample_number - 1 for sample_number in sample_numbers]
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+class VideoIndex:
+    """
+    The frame count, frame rate, frame shape and keyframe positions of a video, found by decoding the video once.
+    The index is stored in a sidecar file next to the video along with the video's size and modification time, so later
+    runs open the video without reading it and seek straight to the keyframe before any frame.
+    The keyframes of an MP4 come from its table of sync samples. Other videos fall back on the decoder's flag for the
+    last packet it read, which a decoder that holds frames back puts a few frames after the keyframe, so those keyframes
+    are only close - they only guide whether to seek, and a seek still decodes forward to the exact frame.
+    """
+
+    # change this when the stored index changes, so old index files are built again
+    version = 2
+
+    def __init__(self, nframes, frame_rate, shape, keyframes):
+        self.nframes = nframes
+        self.frame_rate = frame_rate
+        self.shape = tuple(shape) if shape is not None else None
+        self.keyframes = keyframes
+
+    @staticmethod
+    def from_dict(data):
+        return VideoIndex(data["nframes"], data["frame_rate"], data["shape"], data["keyframes"])
+
+    def to_dict(self):
+        return {"nframes": self.nframes, "frame_rate": self.frame_rate, "shape": self.shape, "keyframes": self.keyframes}
+
+    @staticmethod
+    def get_index_path(video_path):
+        return video_path + ".index.json"
+
+    @staticmethod
+    def _get_file_key(video_path):
+        # the video is indexed again if it changes
+        stats = os.stat(video_path)
+        return {"version": VideoIndex.version, "size": stats.st_size, "mtime_ns": stats.st_mtime_ns}
+
+    @staticmethod
+    def build(video_path):
+        """
+        Function Goal : decode every frame of a video once to find its frames and keyframes
+
+        video_path : string - the path to the video
+
+        return : VideoIndex object
+        """
+        vid = cv2.VideoCapture(video_path)
+        if not vid.isOpened():
+            raise ValueError(f"Unable to open video file: {video_path}")
+        try:
+            frame_rate = vid.get(cv2.CAP_PROP_FPS)
+            shape = None
+            flagged_keyframes = []
+            nframes = 0
+            # grab the frames without converting them to images, only the first is needed for the shape
+            while vid.grab():
+                if vid.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    flagged_keyframes.append(nframes)
+                if shape is None:
+                    _, img = vid.retrieve()
+                    shape = img.shape if img is not None else None
+                nframes += 1
+        finally:
+            vid.release()
+        keyframes = read_mp4_keyframes(video_path)
+        if keyframes is None:
+            keyframes = flagged_keyframes
+        return VideoIndex(nframes, frame_rate, shape, [keyframe for keyframe in keyframes if keyframe < nframes])
+
+    @staticmethod
+    def load(video_path):
+        """
+        Function Goal : read the index of a video from its sidecar file, building and storing it if the file is missing
+                        or the video has changed since
+
+        video_path : string - the path to the video
+
+        return : VideoIndex object
+        """
+        index_path = VideoIndex.get_index_path(video_path)
+        file_key = VideoIndex._get_file_key(video_path)
+        try:
+            with open(index_path, "r") as index_file:
+                data = json.load(index_file)
+            if data["file"] == file_key:
+                return VideoIndex.from_dict(data["index"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = VideoIndex.build(video_path)
+        # write to a temporary file first, so a reader never sees half an index
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as index_file:
+                json.dump({"file": file_key, "index": index.to_dict()}, index_file)
+            os.replace(temp_path, index_path)
+        except OSError:
+            # the index still works for this run if the folder can't be written to
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return index
+
+    def keyframe_before(self, frame_number):
+        """
+        Function Goal : find the last keyframe at or before a frame, which is where decoding to the frame starts from
+
+        frame_number : integer - the frame
+
+        return : integer - the number of the keyframe, or 0 if there's no keyframe before the frame
+        """
+        position = bisect_right(self.keyframes, frame_number)
+        return self.keyframes[position - 1] if position else 0
@@ -0,0 +1,106 @@
+import hashlib
+import os
+
+import cv2
+
+
+def get_proxy_format(lossless):
+    """
+    Function Goal : choose how to write proxies
+                    lossless proxies are the same as resizing the source frames, but decode slower than the source
+                    the others lose a little detail and decode much faster
+
+    lossless : boolean - whether the proxies are written without losing any detail
+
+    return : tuple of strings (str, str) - the file extension and the fourcc code to write the proxies with
+    """
+    if lossless:
+        return "avi", "FFV1"
+    return "mp4", "mp4v"
+
+
+def get_proxy_path(video_path, frame_size, frame_step, cache_folder, lossless=False):
+    """
+    Function Goal : find where the proxy of a video is kept in the cache
+
+    video_path : string - the path to the source video
+    frame_size : tuple of integers (int, int) - the width and height of the proxy's frames
+    frame_step : integer - the proxy keeps every frame_step-th frame of the source video
+    cache_folder : string - the folder the proxies are kept in
+    lossless : boolean - whether the proxy is written without losing any detail
+
+    return : string - the path to the proxy
+    """
+    # the proxy is made again if the source video changes
+    stats = os.stat(video_path)
+    source = f"{os.path.realpath(video_path)}|{stats.st_size}|{stats.st_mtime_ns}"
+    source_hash = hashlib.sha1(source.encode()).hexdigest()[:16]
+    width, height = frame_size
+    extension, _ = get_proxy_format(lossless)
+    return os.path.join(cache_folder, f"{source_hash}_{width}x{height}_step{frame_step}.{extension}")
+
+
+def transcode_video(video_path, output_path, frame_size, frame_step=1, lossless=False):
+    """
+    Function Goal : write a smaller copy of a video, resized to a frame size and keeping every frame_step-th frame
+                    an odd size is padded by a pixel, which 'fit_to_size()' crops off
+
+    video_path : string - the path to the source video
+    output_path : string - the path to write the copy to
+    frame_size : tuple of integers (int, int) - the width and height to resize the frames to
+    frame_step : integer - the number of source frames for each frame of the copy
+    lossless : boolean - whether the copy is written without losing any detail
+
+    return : None
+    """
+    source = cv2.VideoCapture(video_path)
+    if not source.isOpened():
+        raise ValueError(f"Unable to open video file: {video_path}")
+    # videos are only written at even sizes, so odd sizes are padded by a pixel that's cropped off when reading
+    width, height = frame_size
+    pad_right, pad_bottom = width % 2, height % 2
+    writer = cv2.VideoWriter(
+        filename=output_path, fourcc=cv2.VideoWriter_fourcc(*get_proxy_format(lossless)[1]),
+        fps=source.get(cv2.CAP_PROP_FPS) / frame_step, frameSize=(width + pad_right, height + pad_bottom), isColor=True,
+    )
+    try:
+        frame_number = 0
+        # only convert the frames that are kept to images
+        while source.grab():
+            if frame_number % frame_step == 0:
+                success, frame = source.retrieve()
+                if not success:
+                    break
+                frame = cv2.resize(frame, frame_size)
+                writer.write(cv2.copyMakeBorder(frame, 0, pad_bottom, 0, pad_right, cv2.BORDER_REPLICATE))
+            frame_number += 1
+    finally:
+        source.release()
+        writer.release()
+
+
+def get_video_proxy(video_path, frame_size, frame_step, cache_folder, lossless=False):
+    """
+    Function Goal : get the path to a proxy of a video, making the proxy the first time it's asked for
+
+    video_path : string - the path to the source video
+    frame_size : tuple of integers (int, int) - the width and height of the proxy's frames
+    frame_step : integer - the proxy keeps every frame_step-th frame of the source video
+    cache_folder : string - the folder the proxies are kept in
+    lossless : boolean - whether the proxy is written without losing any detail
+
+    return : string - the path to the proxy
+    """
+    proxy_path = get_proxy_path(video_path, frame_size, frame_step, cache_folder, lossless)
+    if not os.path.exists(proxy_path):
+        os.makedirs(cache_folder, exist_ok=True)
+        # write to a temporary file first, so a proxy is never used half written
+        base_path, extension = os.path.splitext(proxy_path)
+        temp_path = f"{base_path}.{os.getpid()}.tmp{extension}"
+        try:
+            transcode_video(video_path, temp_path, frame_size, frame_step, lossless)
+            os.replace(temp_path, proxy_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return proxy_path
@@ -5,40 +5,90 @@ class VideoReader:
     """
     Efficient video reader that supports reading individual frames or loading the entire video.
     Keeps the video file open for efficient frame reading without caching old frames.
+    Remembers where it is in the video, so frames a little ahead are reached by decoding forward to them instead of
+    seeking, which jumps back to a keyframe and decodes forward from there on every frame.
+    With a VideoIndex, the video opens without reading a frame, and it knows how far back from a frame a seek has to
+    start decoding, so it decodes forward instead whenever that's less work.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, max_frames_to_skip=100, index=None):
         self.file_path = file_path
+        self.max_frames_to_skip = max_frames_to_skip
+        self.index = index
         # open the video
         self.vid = cv2.VideoCapture(self.file_path)
         if not self.vid.isOpened():
             raise ValueError(f"Unable to open video file: {self.file_path}")
-        # get video properties
-        self.nframes = int(self.vid.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.frame_rate = self.vid.get(cv2.CAP_PROP_FPS)
-        # get video shape by reading first frame
-        _, img = self.vid.read()
-        self.img_shape = img.shape if img is not None else None
-        self.vid.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        # get video properties from the index if there is one
+        if index is not None:
+            self.nframes = index.nframes
+            self.frame_rate = index.frame_rate
+            self.img_shape = index.shape
+        else:
+            self.nframes = int(self.vid.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.frame_rate = self.vid.get(cv2.CAP_PROP_FPS)
+            # get video shape by reading first frame
+            _, img = self.vid.read()
+            self.img_shape = img.shape if img is not None else None
+            self.vid.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        # the number of the frame the next read gives, None when it isn't known
+        self.position = 0
+        # the last frame read, given again if it's asked for again
+        self.last_frame_number = None
+        self.last_frame = None
+
+    def _move_to_frame(self, frame_number):
+        """
+        Function Goal : get the video ready to read a particular frame next
+
+        frame_number : integer - the frame to read next
+
+        return : None
+        """
+        frames_to_skip = None if self.position is None else frame_number - self.position
+        max_frames_to_skip = self.max_frames_to_skip
+        if self.index is not None:
+            # a seek decodes forward from the keyframe before the frame too, so those frames are free to skip
+            max_frames_to_skip += frame_number - self.index.keyframe_before(frame_number)
+        # seek to the frame when it isn't a little ahead
+        if (frames_to_skip is None) or not (0 <= frames_to_skip <= max_frames_to_skip):
+            self.vid.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            frames_to_skip = 0
+
+        # grab the frames in between without converting them to images
+        for _ in range(frames_to_skip):
+            if not self.vid.grab():
+                self.position = None
+                raise ValueError(f"Frame '{frame_number}' could not be read from video at '{self.file_path}'")
+        self.position = frame_number
 
     def get_frame(self, frame_number):
         """
         Retrieve the image at a specific frame number.
         Keeps the video file open to avoid overhead of reopening the file.
+        Reading frames in increasing order is fastest, as the video only seeks when the next frame is far ahead or behind.
         """
+        frame_number = int(frame_number)
         # check the video has this frame
         if frame_number > self.nframes:
             raise ValueError(
                 f"Cannot get frame number '{frame_number}'. Video at '{self.file_path} only has '{self.nframes}'."
             )
+        # give the last frame again without decoding it again
+        if frame_number == self.last_frame_number:
+            return self.last_frame
         # re-open the video if closed accidentally
         if not self.vid.isOpened():
             self.vid = cv2.VideoCapture(self.file_path)
+            self.position = 0
         # get the frame
-        self.vid.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        self._move_to_frame(frame_number)
         success, img = self.vid.read()
         if not success:
+            self.position = None
             raise ValueError(f"Frame '{frame_number}' could not be read from video at '{self.file_path}'")
+        self.position = frame_number + 1
+        self.last_frame_number, self.last_frame = frame_number, img
 
         return img
 
@@ -49,11 +99,9 @@ class VideoReader:
         """
         frame_nums = range(0, self.nframes, interval)
         for i in frame_nums:
-            self.vid.set(cv2.CAP_PROP_POS_FRAMES, i)
-            success, img = self.vid.read()
-            if success:
-                yield img
-            else:
+            try:
+                yield self.get_frame(i)
+            except ValueError:
                 break
 
     def reset(self):
@@ -61,6 +109,7 @@ class VideoReader:
         Resets the video to the beginning, useful for reprocessing or re-reading frames.
         """
         self.vid.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.position = 0
 
     def release(self):
         """
@@ -0,0 +1,61 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+import cv2
+
+
+def get_segment_format():
+    """
+    Function Goal : choose how to write the segments of a video so they can be joined without losing quality
+                    with ffmpeg, MP4 segments are joined without re-encoding them
+                    without it, the segments are written losslessly and encoded into the final video once when joined
+
+    return : tuple of strings (str, str) - the file extension and the fourcc code to write the segments with
+    """
+    if shutil.which("ffmpeg"):
+        return "mp4", "mp4v"
+    return "avi", "FFV1"
+
+
+def stitch_videos(segment_paths, output_path, frame_rate, frame_size):
+    """
+    Function Goal : join videos end to end into one MP4 video
+
+    segment_paths : list of strings - the paths to the videos to join, in order, written in the 'get_segment_format()' format
+    output_path : string - the path to write the joined video to
+    frame_rate : float - the frame rate of the joined video
+    frame_size : tuple of integers (int, int) - the width and height of the frames
+
+    return : None
+    """
+    if shutil.which("ffmpeg") and all(path.endswith(".mp4") for path in segment_paths):
+        # copy the encoded frames straight into the new file
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+            for path in segment_paths:
+                list_file.write("file '{}'\n".format(os.path.abspath(path).replace("'", "'\\''")))
+        try:
+            subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file.name,
+                 "-c", "copy", output_path],
+                check=True,
+            )
+        finally:
+            os.remove(list_file.name)
+        return
+
+    # decode each segment and encode its frames into the new file
+    writer = cv2.VideoWriter(
+        filename=output_path, fourcc=cv2.VideoWriter_fourcc(*'mp4v'), fps=frame_rate, frameSize=frame_size, isColor=True,
+    )
+    try:
+        for path in segment_paths:
+            segment = cv2.VideoCapture(path)
+            success, frame = segment.read()
+            while success:
+                writer.write(frame)
+                success, frame = segment.read()
+            segment.release()
+    finally:
+        writer.release()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# import libraries
+import argparse
+import os.path
+import time
+
+import yaml
+
+# import helper classes
+from create_heatmap_video import get_colour_lut, limit_worker_threads, make_heatmap_video
+from input_handlers.heatmap_inputs import HeatmapInputHandler, batch_configs
+# import utilities
+from utils.input_utils import exit_if_false, exit_if_try_fails
+from utils.parallel_utils import map_with_retries
+
+
+def start_batch_worker():
+    """
+    Function Goal : get a worker process ready to render jobs
+                    a worker renders its jobs one after another, so the configs, colours, colourmaps, text boxes and
+                    glyphs it caches for one job are ready for the next one
+    """
+    limit_worker_threads()
+    get_colour_lut()
+
+
+def render_job(inputs):
+    """
+    Function Goal : render the video of one job of the batch, inside a worker process
+
+    inputs : HeatmapInputHandler object - the checked inputs of the job
+
+    return : dictionary of string to number {str: number, ...} - the stats from rendering the job
+    """
+    return make_heatmap_video(inputs, show_progress=False)
+
+
+def read_jobs(manifest_path):
+    """
+    Function Goal : read the jobs from a batch's manifest, a YAML file with a list of jobs under 'jobs'
+
+    manifest_path : string - the path to the manifest
+
+    return : list of dictionaries - the details of each job
+    """
+    universal_criteria = "the path to the manifest points to a YAML file with a list of jobs under 'jobs'."
+    # check the path exists
+    exit_if_false(
+        os.path.isfile(manifest_path),
+        error="The manifest path entered does not point to a file.",
+        criteria=universal_criteria,
+    )
+
+    # check it's a YAML file
+    def _load_manifest(path):
+        with open(path, "r") as manifest_file:
+            return yaml.load(manifest_file, Loader=yaml.FullLoader)
+
+    exit_if_try_fails(
+        _load_manifest,
+        args=[manifest_path],
+        exception=(OSError, yaml.YAMLError),
+        error="The manifest can not be read as a YAML file.",
+        criteria=universal_criteria,
+    )
+    manifest = _load_manifest(manifest_path)
+    # check it has a list of jobs
+    jobs = manifest.get("jobs") if isinstance(manifest, dict) else None
+    exit_if_false(
+        isinstance(jobs, list) and jobs and all(isinstance(job, dict) for job in jobs),
+        error="The manifest doesn't contain a list of jobs.",
+        criteria=universal_criteria,
+    )
+    # check the jobs don't write over each other
+    outputs = [job.get("output") for job in jobs]
+    exit_if_false(
+        len(set(outputs)) == len(outputs),
+        error="More than one job in the manifest writes to the same output file.",
+        criteria="each job writes to its own output file.",
+    )
+
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create the heatmap videos of a batch of jobs, such as every floor of a building, rendering a job "
+                    "on each CPU core at once."
+    )
+    # manifest path
+    parser.add_argument(
+        'manifest_path',
+        type=str,
+        help="The path to the YAML manifest listing the jobs.",
+    )
+    # number of workers
+    parser.add_argument(
+        '-w',
+        '--workers',
+        dest="num_workers",
+        default=batch_configs["workers"],
+        type=int,
+        required=False,
+        help="The number of jobs to render at once. Use 0 for one per CPU core.",
+    )
+    # number of segments
+    parser.add_argument(
+        '-s',
+        '--segments',
+        dest="num_segments",
+        default=1,
+        type=int,
+        required=False,
+        help="The number of segments to split the timeline of each job into, for the jobs that don't give their own.",
+    )
+    args = parser.parse_args()
+
+    # check every job before rendering any, so a mistake in the last job doesn't stop the batch part way through
+    jobs = read_jobs(args.manifest_path)
+    job_inputs = []
+    for i, job in enumerate(jobs):
+        print(f"Checking job {i + 1} of {len(jobs)} - '{job.get('output')}'.")
+        inputs = HeatmapInputHandler(job={"segments": args.num_segments, **job})
+        inputs.validate()
+        job_inputs.append(inputs)
+    num_workers = min(HeatmapInputHandler._process_num_workers(args.num_workers), len(jobs))
+
+    # render the jobs, each worker keeping its caches warm between the jobs it renders
+    start_time = time.time()
+    print(f"Rendering {len(jobs)} jobs with {num_workers} workers.")
+    results = map_with_retries(
+        render_job, job_inputs, num_workers, max_retries=batch_configs["retries"], initializer=start_batch_worker,
+    )
+    num_frames = 0
+    for position, stats in results:
+        num_frames += stats["frames"]
+        print(
+            f"Job {position + 1} wrote {stats['frames']} frames to '{job_inputs[position].video_output_file_path}' "
+            f"in {stats['before rendering'] + stats['rendering']:.1f}s."
+        )
+
+    print("---- TOTAL ----")
+    print("Frames = {}".format(num_frames))
+    print("Time taken = {}".format(time.time() - start_time))
+
+
+if __name__ == '__main__':
+    main()
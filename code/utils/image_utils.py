@@ -2,13 +2,44 @@ import cv2
 import numpy as np
 
 
-def uint_to_float(array, scale=False):
-    if array.dtype == np.uint8:
-        if scale:
-            array = cv2.normalize(array, np.zeros(array.shape), 0, 1, cv2.NORM_MINMAX)
-        else:
-            array = array / 255.0
-    return array
+def colour_to_uint(colour):
+    """
+    Function Goal : Turn a colour with values from 0 to 1 into a colour with values from 0 to 255 for uint8 images
+
+    colour : list of floats [float, float, float] - the colour
+
+    return : list of integers [int, int, int] - the colour scaled to 0 to 255
+    """
+    return [int(round(min(max(val, 0), 1) * 255)) for val in colour]
+
+
+def blend_rectangle(image, x_start, y_start, x_end, y_end, colour):
+    """
+    Function Goal : fill a rectangle with corners between pixels, in place, blending the colour into the pixels on its
+                    edges by how much of each pixel the rectangle covers
+
+    image : 3D numpy array of uint8 integers - the image to draw on
+    x_start, y_start, x_end, y_end : floats - the edges of the rectangle, where pixel (i, j) covers i to i + 1 and j to j + 1
+    colour : list of integers [int, int, int] - the colour of the rectangle from 0 to 255
+
+    return : None
+    """
+    height, width = image.shape[:2]
+    x_start, x_end = max(x_start, 0), min(x_end, width)
+    y_start, y_end = max(y_start, 0), min(y_end, height)
+    if (x_start >= x_end) or (y_start >= y_end):
+        return
+
+    # find how much of each row and column the rectangle covers
+    cols = np.arange(int(x_start), int(np.ceil(x_end)))
+    rows = np.arange(int(y_start), int(np.ceil(y_end)))
+    col_cover = np.minimum(cols + 1, x_end) - np.maximum(cols, x_start)
+    row_cover = np.minimum(rows + 1, y_end) - np.maximum(rows, y_start)
+    cover = np.outer(row_cover, col_cover)[:, :, np.newaxis]
+
+    # blend the colour in
+    region = image[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    region[:] = np.rint(region + ((np.asarray(colour, dtype=float) - region) * cover))
 
 
 def fig_to_img(fig):
@@ -19,7 +50,7 @@ def fig_to_img(fig):
 
     fig : matplotlib figure
 
-    return : 3D numpy array of integers - the image drawn from the matplotlib figure
+    return : 3D numpy array of uint8 integers - the image drawn from the matplotlib figure
     """
 
     # draw the renderer
@@ -30,4 +61,21 @@ def fig_to_img(fig):
     buf = np.frombuffer(fig.canvas.tostring_argb(), dtype=np.uint8).reshape(h, w, 4)
 
     # ARGB -> BGR
-    return uint_to_float(buf[:, :, ::-1][:, :, :3])
+    return np.ascontiguousarray(buf[:, :, ::-1][:, :, :3])
+
+
+def fit_to_size(image, size):
+    """
+    Function Goal : resize an image to a size, or crop it if it's at most a pixel bigger
+                    videos are only written at even sizes, so a video made at an odd size is a pixel bigger and is cropped
+
+    image : 3D numpy array - the image
+    size : tuple of integers (int, int) - the width and height to fit the image to
+
+    return : 3D numpy array - the image at the size
+    """
+    width, height = size
+    image_height, image_width = image.shape[:2]
+    if (0 <= image_width - width <= 1) and (0 <= image_height - height <= 1):
+        return image[:height, :width]
+    return cv2.resize(image, size)
@@ -10,3 +10,23 @@ def exit_if_try_fails(function, args, exception, error, criteria):
     except exception:
         print(f"\nInputError: {error}\nPlease re-run this program ensuring {criteria}")
         exit(0)
+
+
+def time_to_seconds(time_text):
+    """
+    Function Goal : turn a time written as a whole number of seconds or as 'HH:MM:SS' into a number of seconds
+
+    time_text : string - the time, e.g. '754' or '00:12:34'
+
+    return : integer - the number of seconds
+    """
+    parts = time_text.strip().split(":")
+    if len(parts) > 3:
+        raise ValueError(f"The time '{time_text}' has more parts than 'HH:MM:SS'.")
+    seconds = 0
+    for part in parts:
+        value = int(part)
+        if value < 0:
+            raise ValueError(f"The time '{time_text}' is negative.")
+        seconds = seconds * 60 + value
+    return seconds
@@ -42,19 +42,6 @@ def get_distance_to_point(p1, p2):
     return np.hypot(p1[0] - p2[0], p1[1] - p2[1])
 
 
-def get_distance_to_line(line_start, line_end, point):
-    """
-    Function Goal : get the distance between a point and a line between two points
-
-    line_start : np.Array integers np.Array([int, int]) - start point for the line
-    line_end : np.Array of integers np.Array(int, int]) - end point for the line
-    point: np.Array of integers np.Array([int, int]) - a point
-
-    return : float - the distance between the point and the line
-    """
-    return np.linalg.norm(np.cross(line_end - line_start, line_start - point)) / np.linalg.norm(line_end - line_start)
-
-
 def get_ratio_interval_point(p1, p2, a, b):
     """
     Function Goal : find the point that divides 2 points into the ratio a:b where dist(p1, point):dist(point, p2) is proportional to a:b
@@ -98,71 +85,103 @@ def convert_polar_to_cartesian(rho, phi):
     return int(x), int(y)
 
 
-def generate_points_on_shape_boundary(boundary_points):
+def get_cross_product(vectors_1, vectors_2):
+    """
+    Function Goal : get the 2D cross product of pairs of vectors
+
+    vectors_1 : numpy array of floats (..., 2) - the first vector of each pair
+    vectors_2 : numpy array of floats (..., 2) - the second vector of each pair
+
+    return : numpy array of floats (...) - the cross product of each pair of vectors
+    """
+    return (vectors_1[..., 0] * vectors_2[..., 1]) - (vectors_1[..., 1] * vectors_2[..., 0])
+
+
+def get_polygon_edges(polygon_points):
     """
-    Function Goal : Use the boundary corner points to generate points on the perimeter of the shape
+    Function Goal : get the edges of a polygon, including the edge from the last corner back to the first
 
-    boundary_points : list of tuples of integers [(int, int), (int, int), ...] - a list of the points representing the corners of the boundary shape
+    polygon_points : list of tuples of integers [(int, int), (int, int), ...] - the corners of the polygon in order
 
-    return : set of tuples of integers [(int, int), (int, int), ...etc.] - a list of points that surround the whole area
+    return : 2 numpy arrays of floats (n, 2), (n, 2) - the start and end of each edge
     """
+    edge_starts = np.asarray(polygon_points, dtype=float).reshape(-1, 2)
+    edge_ends = np.roll(edge_starts, -1, axis=0)
+    return edge_starts, edge_ends
+
 
-    gen_points = set()
-    for i in range(1, len(boundary_points)):
-        prev_x, prev_y = boundary_points[i]
-        x, y = boundary_points[0] if i + 1 >= len(boundary_points) else boundary_points[i + 1]
+def intersect_segments_with_polygon(segment_starts, segment_ends, polygon_points):
+    """
+    Function Goal : find where each line segment first crosses the boundary of a polygon, going from its start to its end
 
-        # if is horizontal line between previous
-        if prev_x == x:
-            for new_y in range(min(prev_y, y), max(prev_y, y)):
-                gen_points.add((x, new_y))
+    segment_starts : numpy array of numbers (m, 2) or a point (int, int) - the start of each segment
+    segment_ends : numpy array of numbers (m, 2) or a point (int, int) - the end of each segment
+    polygon_points : list of tuples of integers [(int, int), (int, int), ...] - the corners of the polygon in order
 
-        # if is vertical line between previous
-        elif prev_y == y:
-            for new_x in range(min(prev_x, x), max(prev_x, x)):
-                gen_points.add((new_x, y))
+    return : numpy array of floats (m, 2) - the first point on the boundary along each segment, NaN if a segment doesn't
+                                            cross the boundary or only runs along it
+    """
+    starts = np.atleast_2d(np.asarray(segment_starts, dtype=float))[:, np.newaxis, :]
+    directions = np.atleast_2d(np.asarray(segment_ends, dtype=float))[:, np.newaxis, :] - starts
+    edge_starts, edge_ends = get_polygon_edges(polygon_points)
+    edge_directions = edge_ends - edge_starts
 
-        # if is sloped line between previous
-        else:
-            slope = get_slope(p1=(prev_x, prev_y), p2=(x, y))
-            length_on_x_axis = max(prev_x, x) - min(prev_x, x)
-            length_on_y_axis = max(prev_y, y) - min(prev_y, y)
-            for j in range(max(length_on_x_axis, length_on_y_axis) + 1):
-                if length_on_x_axis > length_on_y_axis:
-                    x_val = min(prev_x, x) + j
-                    new_y = int(prev_y - (slope * prev_x) + (slope * x_val))
-                    point = (x_val, new_y)
-                else:
-                    y_val = min(prev_y, y) + j
-                    new_x = int(prev_x + ((y_val - prev_y) / slope))
-                    point = (new_x, y_val)
-                gen_points.add(point)
+    # solve start + t * direction = edge_start + u * edge_direction for every segment and edge at once
+    to_edges = edge_starts[np.newaxis, :, :] - starts
+    denominators = get_cross_product(directions, edge_directions[np.newaxis, :, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = get_cross_product(to_edges, edge_directions[np.newaxis, :, :]) / denominators
+        u = get_cross_product(to_edges, directions) / denominators
+    crosses = (denominators != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
 
-    return gen_points
+    # keep the crossing nearest the start of each segment
+    first_t = np.where(crosses, t, np.inf).min(axis=1)
+    first_t[np.isinf(first_t)] = np.nan
+    return starts[:, 0, :] + (first_t[:, np.newaxis] * directions[:, 0, :])
 
 
-def get_closest_point_between_points(points_list, point1, point2):
+def get_closest_points_on_polygon(points, polygon_points):
     """
-    Function Goal : Find the point within a list of points which falls between two points and is closest to the first point
+    Function Goal : find the point on the boundary of a polygon closest to each point
 
-    points_list : list of tuples of integers [(int, int), (int, int), ...] - list of points to find the closest point within
-    point1 : tuple of integers (int, int) - a point we want to be close to
-    point2 : tuple of integers (int, int) - a point
+    points : numpy array of numbers (m, 2) or a point (int, int) - the points to find the closest boundary point to
+    polygon_points : list of tuples of integers [(int, int), (int, int), ...] - the corners of the polygon in order
 
-    return : the point between point1 & point2 which is closest to point1
+    return : numpy array of floats (m, 2), numpy array of floats (m,) - the closest boundary point to each point and the
+                                                                        distance to it
     """
-    closest = None
-    closest_dist = np.inf
-    for boundary_point in points_list:
-        start_x, start_y = point1
-        end_x, end_y = point2
-        x, y = boundary_point
-        x_is_between = (start_x < x < end_x) or (end_x < x < start_x)
-        y_is_between = (start_y < y < end_y) or (end_y < y < start_y)
-        if x_is_between and y_is_between:
-            dist = get_distance_to_line(np.array(point1), np.array(point2), np.array(boundary_point))
-            if dist < closest_dist:
-                closest = boundary_point
-                closest_dist = dist
+    points = np.atleast_2d(np.asarray(points, dtype=float))[:, np.newaxis, :]
+    edge_starts, edge_ends = get_polygon_edges(polygon_points)
+    edge_directions = edge_ends - edge_starts
+    edge_lengths_squared = (edge_directions ** 2).sum(axis=1)
+
+    # project each point onto each edge, keeping the projection on the edge
+    along_edges = ((points - edge_starts) * edge_directions).sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(edge_lengths_squared > 0, along_edges / edge_lengths_squared, 0)
+    projections = edge_starts + (np.clip(t, 0, 1)[:, :, np.newaxis] * edge_directions)
+
+    # keep the nearest projection for each point
+    distances = np.linalg.norm(points - projections, axis=2)
+    nearest_edges = distances.argmin(axis=1)
+    rows = np.arange(len(distances))
+    return projections[rows, nearest_edges], distances[rows, nearest_edges]
 
-    return closest
+
+def split_length(length, proportions):
+    """
+    Function Goal : split a length of whole pixels into parts in the given proportions, so the parts add up to exactly
+                    the length - the pixels left over from rounding each part down go to the parts that lost the most
+
+    length : integer - the number of pixels to split
+    proportions : list of numbers [float, float, ...] - the share of the length for each part, these are scaled to add up to 1
+
+    return : list of integers [int, int, ...] - the number of pixels in each part
+    """
+    shares = np.asarray(proportions, dtype=float)
+    shares = length * shares / shares.sum()
+    parts = np.floor(shares).astype(int)
+    leftover = int(length - parts.sum())
+    # a stable sort gives the leftover pixels to the earlier parts when the parts lost the same amount
+    parts[np.argsort(parts - shares, kind="stable")[:leftover]] += 1
+    return parts.tolist()
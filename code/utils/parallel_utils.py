@@ -0,0 +1,164 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# marks the end of the tasks in the queues between the stages of a pipeline
+_end_of_tasks = object()
+
+
+def map_in_order(function, tasks, num_workers, initializer=None, initargs=(), max_pending=None):
+    """
+    Function Goal : run a function on each task in a pool of worker processes and give back the results in the order
+                    the tasks were given, no matter which order the workers finish them in
+
+    function : function - a module level function that takes one task, it runs inside the worker processes
+    tasks : iterable - the tasks to run the function on, only read as fast as the results are taken
+    num_workers : integer - the number of worker processes to start
+    initializer : function - a module level function run once in each worker process when it starts
+    initargs : tuple - the arguments to call the initializer with
+    max_pending : integer - the most tasks waiting to be taken at once, this bounds the memory used by finished results
+                            waiting for an earlier task to finish (default is 2 tasks per worker)
+
+    return : generator - the result of the function for each task, in the order of the tasks
+    """
+    max_pending = max_pending or (2 * num_workers)
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=initializer, initargs=initargs) as pool:
+        # the queue of futures is the reorder buffer - a finished future waits in it until the ones before it are taken
+        pending = deque(pool.submit(function, task) for _, task in zip(range(max_pending), tasks))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for task in tasks:
+                    pending.append(pool.submit(function, task))
+                    break
+                yield result
+        finally:
+            # don't wait for the remaining frames if the caller stopped early
+            for future in pending:
+                future.cancel()
+
+
+def map_with_retries(function, tasks, num_workers, max_retries=1, initializer=None, initargs=()):
+    """
+    Function Goal : run a function on each task in a pool of worker processes, running only the tasks that failed again
+                    in a new pool so a crashed worker doesn't lose the work done on the other tasks
+
+    function : function - a module level function that takes one task, it runs inside the worker processes
+    tasks : iterable - the tasks to run the function on
+    num_workers : integer - the number of worker processes to start
+    max_retries : integer - the number of times to try a failed task again before giving up
+    initializer : function - a module level function run once in each worker process when it starts
+    initargs : tuple - the arguments to call the initializer with
+
+    return : generator - tuples (int, result) of the position of each task and its result, in the order they finish
+    """
+    tasks = list(tasks)
+    remaining = list(range(len(tasks)))
+    for attempt in range(max_retries + 1):
+        failed = []
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(function, tasks[i]): i for i in remaining}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as error:
+                    print(f"WARNING: Task {futures[future]} failed on attempt {attempt + 1} with the error '{error!r}'.")
+                    failed.append(futures[future])
+                    last_error = error
+                    continue
+                yield futures[future], result
+        if not failed:
+            return
+        remaining = sorted(failed)
+    raise last_error
+
+
+def run_pipeline(tasks, stages, queue_size):
+    """
+    Function Goal : run each task through a chain of stages, each stage in its own thread, with bounded queues between
+                    the stages so they work on different tasks at the same time
+                    OpenCV lets go of the GIL while it decodes, resizes, draws and encodes, so the threads overlap
+
+    tasks : iterable - the tasks to give the first stage, read in its thread
+    stages : list of tuples [(str, function), ...] - the name of each stage and the function it runs on each result of
+                                                     the stage before, the results of the last stage are thrown away
+    queue_size : integer - the most results waiting between two stages, this bounds the memory used when one stage is
+                           faster than the next
+
+    return : dictionary of string to dictionary {str: {str: float, ...}, ...} - the seconds each stage spent working,
+                                                                               waiting for input and waiting for its
+                                                                               output to be taken
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages[1:]]
+    stop = threading.Event()
+    errors = []
+    stats = {name: {"busy": 0.0, "waiting for input": 0.0, "waiting for output": 0.0} for name, _ in stages}
+
+    def get(in_queue):
+        # check for a failed stage while waiting so no thread waits forever
+        while not stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _end_of_tasks
+
+    def put(out_queue, item):
+        while not stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read_queue(in_queue):
+        # compare by identity, as the items can be numpy arrays
+        item = get(in_queue)
+        while item is not _end_of_tasks:
+            yield item
+            item = get(in_queue)
+
+    def run_stage(position, name, function):
+        items = iter(tasks) if position == 0 else read_queue(queues[position - 1])
+        out_queue = queues[position] if position < len(queues) else None
+        stage_stats = stats[name]
+        try:
+            while not stop.is_set():
+                wait_start = time.perf_counter()
+                item = next(items, _end_of_tasks)
+                work_start = time.perf_counter()
+                stage_stats["waiting for input"] += work_start - wait_start
+                if item is _end_of_tasks:
+                    break
+                result = function(item)
+                put_start = time.perf_counter()
+                stage_stats["busy"] += put_start - work_start
+                if out_queue is not None:
+                    put(out_queue, result)
+                    stage_stats["waiting for output"] += time.perf_counter() - put_start
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+        finally:
+            if out_queue is not None:
+                put(out_queue, _end_of_tasks)
+
+    threads = [
+        threading.Thread(target=run_stage, args=(position, name, function), name=name, daemon=True)
+        for position, (name, function) in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        # join with a timeout so the main thread can still be interrupted
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.1)
+    finally:
+        stop.set()
+    if errors:
+        raise errors[0]
+    return stats